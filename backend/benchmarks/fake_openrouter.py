@@ -0,0 +1,65 @@
+"""Stand-in for the OpenRouter chat completions API.
+
+Answers with canned trait adjustments or a canned strategic plan after a
+configurable delay, and fails a configurable fraction of calls with a 503.
+Supports both plain and `stream: true` requests.
+"""
+import asyncio
+import json
+import random
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+TRAIT_RESPONSE = {
+    "openness": 0.1,
+    "conscientiousness": 0.05,
+    "extraversion": -0.05,
+    "agreeableness": 0.0,
+    "neuroticism": -0.1
+}
+
+PLAN_RESPONSE = {
+    "title": "Benchmark Plan",
+    "analysis": "Synthetic analysis produced by the benchmark stand-in server.",
+    "recommendations": [
+        "Keep a steady journaling rhythm",
+        "Schedule one quiet hour each day",
+        "Review goals every Sunday",
+        "Share a win with a friend"
+    ],
+    "zen_insight": "The river does not hurry, yet it arrives."
+}
+
+def create_app(latency: float = 0.2, jitter: float = 0.05, error_rate: float = 0.0, seed: int = 0) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(seed)
+    app.state.calls = 0
+
+    @app.post("/api/v1/chat/completions")
+    async def chat_completions(request: Request):
+        app.state.calls += 1
+        body = await request.json()
+        prompt = body["messages"][0]["content"]
+        await asyncio.sleep(max(0.0, latency + rng.uniform(-jitter, jitter)))
+
+        if rng.random() < error_rate:
+            return JSONResponse({"error": "upstream overloaded"}, status_code=503)
+
+        payload = TRAIT_RESPONSE if "Big Five personality traits" in prompt and "Journal entry" in prompt else PLAN_RESPONSE
+        content = json.dumps(payload)
+
+        if body.get("stream"):
+            async def events():
+                for start in range(0, len(content), 16):
+                    chunk = {"choices": [{"delta": {"content": content[start:start + 16]}}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                    await asyncio.sleep(0.005)
+                yield "data: [DONE]\n\n"
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        return {
+            "choices": [{"message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4, "total_tokens": (len(prompt) + len(content)) // 4}
+        }
+
+    return app
@@ -0,0 +1,243 @@
+"""Self-contained load test for the KiraAI API.
+
+Starts the FastAPI app against an in-memory Mongo substitute (mongomock-motor)
+and a local fake OpenRouter server, drives a weighted mix of user actions
+from concurrent virtual users, and prints throughput and p50/p95/p99 latency
+per endpoint as JSON. No network access or MongoDB server is needed.
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/load_test.py --duration 30 --users 20 --output bench.json
+    python benchmarks/load_test.py --baseline bench.json --tolerance 0.25
+
+With --baseline the run exits non-zero if any endpoint's p95 regressed by
+more than the tolerance, so it can gate CI.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx
+import numpy as np
+import uvicorn
+
+SAMPLE_ENTRIES = [
+    "Long day at work, the project deadline has me stressed but the team was supportive.",
+    "Went for a run this morning and felt calm and focused for the rest of the day.",
+    "Spent the evening alone reading, it was quiet and peaceful. I want to learn more about design.",
+    "Had a small conflict with a friend, I worry that I was too harsh. Need to reflect on it.",
+    "Grateful for family dinner tonight, everyone was happy and we talked for hours.",
+    "Feeling anxious about the presentation tomorrow, trying to stay organized and prepared.",
+]
+
+# action name -> relative weight in the mix
+DEFAULT_MIX = {
+    "create_entry": 25,
+    "list_entries": 30,
+    "read_traits": 20,
+    "read_me": 10,
+    "plan_history": 8,
+    "generate_plan": 4,
+    "login": 3,
+}
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def _serve(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server
+
+def _use_memory_mongo():
+    """Point database.connect_to_mongo at mongomock-motor instead of a real server"""
+    from mongomock_motor import AsyncMongoMockClient
+    import database
+
+    class MemoryMotorClient(AsyncMongoMockClient):
+        def __init__(self, *args, **kwargs):
+            kwargs.pop("server_api", None)
+            kwargs.pop("event_listeners", None)
+            super().__init__()
+
+    database.AsyncIOMotorClient = MemoryMotorClient
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def timed(self, label: str, request) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            response = None
+        self.samples[label].append(time.perf_counter() - started)
+        if response is None or response.status_code >= 400:
+            self.errors[label] += 1
+        return response
+
+    def report(self, elapsed: float) -> Dict:
+        endpoints = {}
+        for label, samples in sorted(self.samples.items()):
+            values = np.array(samples) * 1000
+            endpoints[label] = {
+                "count": len(samples),
+                "errors": self.errors[label],
+                "throughput_rps": round(len(samples) / elapsed, 2),
+                "mean_ms": round(float(values.mean()), 2),
+                "p50_ms": round(float(np.percentile(values, 50)), 2),
+                "p95_ms": round(float(np.percentile(values, 95)), 2),
+                "p99_ms": round(float(np.percentile(values, 99)), 2),
+            }
+        total = sum(len(samples) for samples in self.samples.values())
+        return {
+            "duration_s": round(elapsed, 2),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2),
+            "errors": sum(self.errors.values()),
+            "endpoints": endpoints,
+        }
+
+async def virtual_user(client: httpx.AsyncClient, recorder: Recorder, deadline: float, mix: Dict[str, int], rng: random.Random):
+    username = f"bench-{uuid.uuid4().hex[:10]}"
+    password = "bench-password"
+    await recorder.timed("POST /api/auth/register", client.post(
+        "/api/auth/register",
+        json={"username": username, "email": f"{username}@example.com", "password": password}
+    ))
+
+    async def login() -> Dict[str, str]:
+        response = await recorder.timed("POST /api/auth/login", client.post(
+            "/api/auth/login", params={"username": username, "password": password}
+        ))
+        token = response.json()["access_token"] if response is not None and response.status_code == 200 else ""
+        return {"Authorization": f"Bearer {token}"}
+
+    headers = await login()
+
+    async def create_entry():
+        await recorder.timed("POST /api/journal/", client.post("/api/journal/", headers=headers, json={
+            "title": "Benchmark entry",
+            "content": rng.choice(SAMPLE_ENTRIES),
+            "mood_rating": rng.randint(1, 10),
+            "tags": rng.sample(["work", "health", "family", "growth"], 2),
+        }))
+
+    # Plan generation needs at least one recent entry
+    await create_entry()
+
+    actions = {
+        "create_entry": create_entry,
+        "list_entries": lambda: recorder.timed("GET /api/journal/", client.get("/api/journal/", headers=headers)),
+        "read_traits": lambda: recorder.timed("GET /api/traits/", client.get("/api/traits/", headers=headers)),
+        "read_me": lambda: recorder.timed("GET /api/auth/me", client.get("/api/auth/me", headers=headers)),
+        "plan_history": lambda: recorder.timed("GET /api/strategic-plan/history", client.get("/api/strategic-plan/history", headers=headers)),
+        "generate_plan": lambda: recorder.timed("POST /api/strategic-plan/generate", client.post("/api/strategic-plan/generate", headers=headers)),
+        "login": login,
+    }
+    names = list(mix)
+    weights = [mix[name] for name in names]
+
+    while time.monotonic() < deadline:
+        await actions[rng.choices(names, weights)[0]]()
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    regressions = []
+    for label, stats in baseline.get("endpoints", {}).items():
+        current = report["endpoints"].get(label)
+        if current is None:
+            continue
+        limit = stats["p95_ms"] * (1 + tolerance)
+        if current["p95_ms"] > limit:
+            regressions.append(f"{label}: p95 {current['p95_ms']}ms > {limit:.2f}ms (baseline {stats['p95_ms']}ms)")
+    return regressions
+
+async def run(args) -> Dict:
+    from benchmarks.fake_openrouter import create_app
+
+    llm_port = _free_port()
+    os.environ["OPENROUTER_BASE_URL"] = f"http://127.0.0.1:{llm_port}/api/v1"
+    os.environ["OPENROUTER_API_KEY"] = "benchmark"
+    os.environ.setdefault("BCRYPT_ROUNDS", str(args.bcrypt_rounds))
+    _use_memory_mongo()
+
+    # Imported only now so modules pick up the environment set above
+    from main import app
+
+    llm_server = await _serve(create_app(args.llm_latency, args.llm_jitter, args.llm_error_rate, args.seed), llm_port)
+    api_port = _free_port()
+    api_server = await _serve(app, api_port)
+
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{api_port}", limits=limits, timeout=60.0) as client:
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            virtual_user(client, recorder, deadline, DEFAULT_MIX, random.Random(rng.random()))
+            for _ in range(args.users)
+        ])
+        elapsed = time.monotonic() - started
+
+    api_server.should_exit = True
+    llm_server.should_exit = True
+    await asyncio.sleep(0.2)
+
+    report = recorder.report(elapsed)
+    report["config"] = {
+        "users": args.users,
+        "duration_s": args.duration,
+        "llm_latency_s": args.llm_latency,
+        "llm_error_rate": args.llm_error_rate,
+        "bcrypt_rounds": int(os.environ["BCRYPT_ROUNDS"]),
+    }
+    return report
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the KiraAI API without external services")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds to run the mix")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="fake OpenRouter response delay in seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.05)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="fraction of LLM calls that return 503")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4, help="bcrypt cost used for the run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here as well as to stdout")
+    parser.add_argument("--baseline", help="previous JSON report to compare p95 latencies against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative p95 regression")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print("Latency regressions:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Serialization cost of the journal list response, per 100 entries.
+
+Compares the model path (a JournalEntryResponse per document, validated
+against response_model and encoded by FastAPI) with the direct
+document-to-bytes path the list endpoints use, and checks both produce the
+same JSON.
+
+    python benchmarks/serialization.py --entries 100 --repeat 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from models.journal import JournalEntryResponse
+from routers.journal import ENTRY_FIELDS, ENTRY_DEFAULTS, _entry_response
+from utils.serialization import serialize_documents
+
+def sample_documents(count: int) -> List[Dict]:
+    now = datetime.utcnow().replace(microsecond=123000)
+    return [
+        {
+            "_id": ObjectId(),
+            "title": f"Entry {i}",
+            "content": "Went for a long walk and thought about the week ahead. " * 8,
+            "mood_rating": i % 10 + 1 if i % 3 else None,
+            "tags": ["health", "reflection"],
+            "created_at": now - timedelta(hours=i),
+            "updated_at": now - timedelta(hours=i)
+        }
+        for i in range(count)
+    ]
+
+async def model_path(docs: List[Dict], field, response_class) -> bytes:
+    content = [_entry_response(doc) for doc in docs]
+    value = await serialize_response(field=field, response_content=content, is_coroutine=True)
+    return response_class(value).body
+
+def direct_path(docs: List[Dict]) -> bytes:
+    return serialize_documents(docs, ENTRY_FIELDS, ENTRY_DEFAULTS)
+
+async def measure(docs: List[Dict], repeat: int) -> Dict[str, float]:
+    field = create_response_field(name="response", type_=List[JournalEntryResponse])
+    results = {}
+
+    for label, response_class in (("model_json", JSONResponse), ("model_orjson", ORJSONResponse)):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            await model_path(docs, field, response_class)
+        results[label] = (time.perf_counter() - started) / repeat
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        direct_path(docs)
+    results["direct_orjson"] = (time.perf_counter() - started) / repeat
+
+    if json.loads(await model_path(docs, field, JSONResponse)) != json.loads(direct_path(docs)):
+        raise AssertionError("direct serializer output differs from the model path")
+    return results
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark journal list serialization")
+    parser.add_argument("--entries", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(measure(sample_documents(args.entries), args.repeat))
+    scale = 100 / args.entries
+    baseline = results["model_json"]
+    report = {
+        label: {
+            "ms_per_100_entries": round(seconds * scale * 1000, 3),
+            "speedup": round(baseline / seconds, 1)
+        }
+        for label, seconds in results.items()
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -2,6 +2,8 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.server_api import ServerApi
 import os
 from dotenv import load_dotenv
+from indexes import ensure_indexes, verify_indexes, MONGO_INDEX_CHECK
+from utils.metrics import MongoCommandListener
 
 load_dotenv()
 
@@ -13,12 +15,18 @@ async def connect_to_mongo():
     try:
         client = AsyncIOMotorClient(
             os.getenv("MONGODB_URI"),
-            server_api=ServerApi('1')
+            server_api=ServerApi('1'),
+            event_listeners=[MongoCommandListener()]
         )
         database = client.kiraai
+        await ensure_indexes(database)
         print("Connected to MongoDB")
     except Exception as e:
         print(f"Error connecting to MongoDB: {e}")
+    
+    # Outside the try block on purpose: a failed index check must stop startup
+    if MONGO_INDEX_CHECK:
+        await verify_indexes(database)
 
 async def close_mongo_connection():
     global client
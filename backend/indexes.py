@@ -0,0 +1,157 @@
+"""Declarative index registry for every collection the routers query.
+
+ensure_indexes() is run by connect_to_mongo on every startup; creating an
+index that already exists with the same spec is a no-op. verify_indexes()
+explains each hot query and raises if any of them falls back to a
+collection scan. It runs at startup when MONGO_INDEX_CHECK is set, or from
+the command line:
+
+    python indexes.py --check
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MONGO_INDEX_CHECK = os.getenv("MONGO_INDEX_CHECK", "false").lower() in ("1", "true", "yes")
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "journal_entries": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("tags", ASCENDING)]),
+        IndexModel(
+            [("user_id", ASCENDING), ("import_id", ASCENDING), ("created_at", ASCENDING)],
+            partialFilterExpression={"import_id": {"$exists": True}}
+        ),
+    ],
+    "journal_imports": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "trait_history": [
+        IndexModel([("user_id", ASCENDING), ("updated_at", DESCENDING)]),
+    ],
+    # Staging area for replay_traits.py
+    "trait_history_replay": [
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)]),
+    ],
+    "strategic_plans": [
+        IndexModel([("user_id", ASCENDING), ("generated_at", DESCENDING), ("_id", DESCENDING)]),
+    ],
+    "users": [
+        IndexModel([("username", ASCENDING)]),
+        IndexModel([("email", ASCENDING)]),
+    ],
+    "plan_locks": [
+        IndexModel([("lease_until", ASCENDING)], expireAfterSeconds=0),
+    ],
+    "trait_jobs": [
+        IndexModel([("status", ASCENDING), ("next_run_at", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("lease_until", ASCENDING)]),
+    ],
+}
+
+# Created one by one and allowed to fail, for servers without text-index support
+OPTIONAL_INDEXES: Dict[str, List[IndexModel]] = {
+    "journal_entries": [
+        IndexModel(
+            [("user_id", ASCENDING), ("title", TEXT), ("content", TEXT)],
+            weights={"title": 3, "content": 1}
+        ),
+    ],
+}
+
+_sample_id = ObjectId()
+_sample_time = datetime.utcnow()
+
+# (description, collection, filter, sort) for each query issued on a hot path
+QUERY_CHECKS: List[Tuple[str, str, Dict, List]] = [
+    ("list journal entries", "journal_entries",
+     {"user_id": _sample_id}, [("created_at", -1), ("_id", -1)]),
+    ("list journal entries after cursor", "journal_entries",
+     {"user_id": _sample_id, "$or": [{"created_at": {"$lt": _sample_time}}, {"created_at": _sample_time, "_id": {"$lt": _sample_id}}]},
+     [("created_at", -1), ("_id", -1)]),
+    ("recent entries for plan", "journal_entries",
+     {"user_id": _sample_id, "created_at": {"$gte": _sample_time}}, [("created_at", -1)]),
+    ("trait update context", "journal_entries",
+     {"user_id": _sample_id, "_id": {"$nin": [_sample_id]}}, [("created_at", -1)]),
+    ("search journal entries by tag", "journal_entries",
+     {"user_id": _sample_id, "tags": {"$all": ["sample"]}}, [("created_at", -1), ("_id", -1)]),
+    ("imported entries for traits", "journal_entries",
+     {"user_id": _sample_id, "import_id": _sample_id}, [("created_at", 1), ("_id", 1)]),
+    ("import history", "journal_imports",
+     {"user_id": _sample_id}, [("created_at", -1)]),
+    ("trait history", "trait_history",
+     {"user_id": _sample_id}, [("updated_at", -1)]),
+    ("plan history", "strategic_plans",
+     {"user_id": _sample_id}, [("generated_at", -1), ("_id", -1)]),
+    ("user by username", "users",
+     {"username": "sample"}, []),
+    ("register duplicate check", "users",
+     {"$or": [{"username": "sample"}, {"email": "sample@example.com"}]}, []),
+    ("claim trait job", "trait_jobs",
+     {"$or": [{"status": "pending", "next_run_at": {"$lte": _sample_time}}, {"status": "processing", "lease_until": {"$lte": _sample_time}}]},
+     [("next_run_at", 1)]),
+]
+
+async def ensure_indexes(db):
+    for collection, indexes in INDEXES.items():
+        await db[collection].create_indexes(indexes)
+    for collection, indexes in OPTIONAL_INDEXES.items():
+        for index in indexes:
+            try:
+                await db[collection].create_indexes([index])
+            except Exception as e:
+                print(f"Skipping optional index on {collection}: {e}")
+
+def _find_stages(plan) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_find_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_find_stages(item))
+    return stages
+
+async def verify_indexes(db):
+    """Explain every registered query and raise if any winning plan is a COLLSCAN"""
+    offenders = []
+    for description, collection, query, sort in QUERY_CHECKS:
+        cursor = db[collection].find(query).limit(1)
+        if sort:
+            cursor = cursor.sort(sort)
+        explanation = await cursor.explain()
+        if "COLLSCAN" in _find_stages(explanation["queryPlanner"]["winningPlan"]):
+            offenders.append(f"{description} ({collection}: {query})")
+
+    if offenders:
+        raise RuntimeError("Queries without index support:\n  " + "\n  ".join(offenders))
+    print(f"Index check passed for {len(QUERY_CHECKS)} queries")
+
+async def _main(check: bool):
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from pymongo.server_api import ServerApi
+
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI"), server_api=ServerApi('1'))
+    try:
+        await ensure_indexes(client.kiraai)
+        print("Indexes applied")
+        if check:
+            await verify_indexes(client.kiraai)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Apply and optionally verify MongoDB indexes")
+    parser.add_argument("--check", action="store_true", help="fail if any hot query is a collection scan")
+    args = parser.parse_args()
+    asyncio.run(_main(args.check))
@@ -1,8 +1,20 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from database import connect_to_mongo, close_mongo_connection
-from routers import auth, journal, traits, strategic_plan
+from routers import auth, journal, traits, strategic_plan, dashboard
+from utils.trait_queue import trait_queue
+from utils.llm_client import llm_client
+from utils.llm_cache import llm_cache, LLM_CACHE_MONGO
+from utils.pagination import NEXT_CURSOR_HEADER
+from utils.auth import password_hasher, user_cache
+from utils.search import journal_search
+from utils.similarity import similarity_index
+from utils.context_builder import context_builder
+from utils.dashboard import dashboard_summaries
+from utils.journal_import import journal_importer
+from utils.metrics import MetricsMiddleware, registry
 import os
 from dotenv import load_dotenv
 
@@ -11,33 +23,70 @@ load_dotenv()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await connect_to_mongo()
+    await llm_client.start()
+    if LLM_CACHE_MONGO:
+        await llm_cache.enable_mongo()
+    await trait_queue.start()
     yield
+    await trait_queue.stop()
+    await llm_client.close()
     await close_mongo_connection()
 
 app = FastAPI(
     title="KiraAI API",
     description="AI-powered journal and planning application",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
+app.add_middleware(MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(journal.router, prefix="/api/journal", tags=["journal"])
 app.include_router(traits.router, prefix="/api/traits", tags=["traits"])
 app.include_router(strategic_plan.router, prefix="/api/strategic-plan", tags=["strategic-plan"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to KiraAI API"}
 
+@app.get("/llm/stats")
+async def llm_stats():
+    return {**llm_client.stats(), "cache": llm_cache.stats()}
+
+@app.get("/auth/stats")
+async def auth_stats():
+    return {"password_hasher": password_hasher.stats(), "user_cache": user_cache.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of request, MongoDB and LLM metrics"""
+    body = registry.render({
+        "llm_client": llm_client.stats(),
+        "llm_cache": llm_cache.stats(),
+        "trait_queue": trait_queue.stats(),
+        "password_hasher": password_hasher.stats(),
+        "user_cache": user_cache.stats(),
+        "journal_search": journal_search.stats(),
+        "similarity_index": similarity_index.stats(),
+        "context_builder": context_builder.stats(),
+        "dashboard_summaries": dashboard_summaries.stats(),
+        "journal_import": journal_importer.stats(),
+        "plan_generation": {"flights": strategic_plan.plan_flights.stats(), "locks": strategic_plan.plan_locks.stats()}
+    })
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
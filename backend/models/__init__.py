@@ -1,9 +1,9 @@
 from .user import User, UserCreate, UserResponse, Token, TokenData, BigFiveTraits
-from .journal import JournalEntry, JournalEntryCreate, JournalEntryUpdate, JournalEntryResponse
+from .journal import JournalEntry, JournalEntryCreate, JournalEntryImport, JournalEntryUpdate, JournalEntryResponse, JournalEntrySummary, JournalSearchResult, TraitUpdateStatus, JournalImportError, JournalImportStatus
 from .strategic_plan import StrategicPlan, StrategicPlanResponse
 
 __all__ = [
     "User", "UserCreate", "UserResponse", "Token", "TokenData", "BigFiveTraits",
-    "JournalEntry", "JournalEntryCreate", "JournalEntryUpdate", "JournalEntryResponse",
+    "JournalEntry", "JournalEntryCreate", "JournalEntryImport", "JournalEntryUpdate", "JournalEntryResponse", "JournalEntrySummary", "JournalSearchResult", "TraitUpdateStatus", "JournalImportError", "JournalImportStatus",
     "StrategicPlan", "StrategicPlanResponse"
 ]
\ No newline at end of file
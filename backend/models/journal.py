@@ -25,6 +25,11 @@ class JournalEntryCreate(BaseModel):
     mood_rating: Optional[int] = Field(default=None, ge=1, le=10)
     tags: List[str] = Field(default_factory=list)
 
+class JournalEntryImport(JournalEntryCreate):
+    """One record of a bulk import; entries keep their original dates when given"""
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
 class JournalEntryUpdate(BaseModel):
     title: Optional[str] = None
     content: Optional[str] = None
@@ -38,4 +43,42 @@ class JournalEntryResponse(BaseModel):
     mood_rating: Optional[int]
     tags: List[str]
     created_at: datetime
-    updated_at: datetime
\ No newline at end of file
+    updated_at: datetime
+    trait_status: Optional[str] = None
+
+class JournalEntrySummary(BaseModel):
+    id: str
+    title: str
+    preview: str
+    word_count: int
+    mood_rating: Optional[int]
+    tags: List[str]
+    created_at: datetime
+    updated_at: datetime
+
+class JournalSearchResult(JournalEntryResponse):
+    score: float = 0.0
+
+class TraitUpdateStatus(BaseModel):
+    entry_id: str
+    status: str
+    attempts: int = 0
+    last_error: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+class JournalImportError(BaseModel):
+    record: int
+    error: str
+
+class JournalImportStatus(BaseModel):
+    id: str
+    status: str
+    format: Optional[str] = None
+    received: int = 0
+    imported: int = 0
+    rejected: int = 0
+    errors: List[JournalImportError] = Field(default_factory=list)
+    trait_status: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
\ No newline at end of file
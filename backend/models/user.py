@@ -29,7 +29,8 @@ class User(BaseModel):
     id: Optional[PyObjectId] = Field(default_factory=PyObjectId, alias="_id")
     username: str
     email: str
-    hashed_password: str
+    # Not loaded for authenticated requests; only login reads the hash
+    hashed_password: Optional[str] = None
     traits: BigFiveTraits = Field(default_factory=BigFiveTraits)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
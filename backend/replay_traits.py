@@ -0,0 +1,233 @@
+"""Recompute users.traits and trait_history from journal_entries.
+
+Replays every user's entries in created_at order through the keyword
+analyzer and the same smoothing step as update_traits_from_entry. The
+keyword analyzer is used instead of the LLM so the replay is deterministic.
+Each user's new history is written to trait_history_replay first and only
+swapped into trait_history once their traits were updated, so a user
+skipped after conflicts keeps history and traits that agree.
+Users are spread across a process pool. Finished users are checkpointed
+under --run-id, so an interrupted backfill resumes where it stopped.
+
+Stop the API's trait workers (TRAIT_WORKERS=0) for the duration of a
+replay. A live trait update that lands mid-replay is detected by the same
+updated_at guard the workers use and the user is replayed again, but the
+history it wrote is replaced by the replay.
+
+    python replay_traits.py --run-id lexicon-v2 --workers 8
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import MongoClient, InsertOne, DeleteMany, UpdateOne
+from pymongo.server_api import ServerApi
+from utils.lexicon import TRAITS
+from utils.traits import TraitAnalyzer, apply_trait_adjustments, DEFAULT_TRAITS, TRAIT_SMOOTHING
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_db = None
+_analyzer = None
+_smoothing = TRAIT_SMOOTHING
+_chunk_size = 500
+_dry_run = False
+
+# Replays of one user before giving up while live trait updates keep changing it
+REPLAY_ATTEMPTS = 3
+# Same cap as the $slice in update_traits_from_entry
+TRAIT_ENTRY_IDS_KEPT = 50
+
+def _init_worker(uri: str, smoothing: float, chunk_size: int, dry_run: bool):
+    global _db, _analyzer, _smoothing, _chunk_size, _dry_run
+    _db = MongoClient(uri, server_api=ServerApi('1')).kiraai
+    _analyzer = TraitAnalyzer()
+    _smoothing = smoothing
+    _chunk_size = chunk_size
+    _dry_run = dry_run
+
+def _initial_traits(user: Dict) -> Dict[str, float]:
+    """Traits the user had before their first analyzed entry"""
+    # An import record's previous_traits already include earlier entries, which are replayed one by one
+    first = _db.trait_history.find_one(
+        {"user_id": user["_id"], "previous_traits": {"$exists": True}, "source": {"$ne": "import"}},
+        sort=[("updated_at", 1)]
+    )
+    if first:
+        return dict(first["previous_traits"])
+    return dict(user.get("traits") or DEFAULT_TRAITS)
+
+def _swap_history(user_id: ObjectId):
+    """Replace the user's trait history with their staged replay"""
+    _db.trait_history.delete_many({"user_id": user_id})
+    batch: List[Dict] = []
+    for record in _db.trait_history_replay.find({"user_id": user_id}).sort("_id", 1).batch_size(_chunk_size):
+        batch.append(record)
+        if len(batch) >= _chunk_size:
+            _db.trait_history.insert_many(batch)
+            batch = []
+    if batch:
+        _db.trait_history.insert_many(batch)
+    _db.trait_history_replay.delete_many({"user_id": user_id})
+
+def _kept_trait_ids(user: Dict, recent_entry_ids: List[ObjectId]) -> List[ObjectId]:
+    """trait_entry_ids after a replay: the replayed entries plus any other applied ids, such as imports"""
+    existing = user.get("trait_entry_ids", [])
+    entry_ids = {entry["_id"] for entry in _db.journal_entries.find({"_id": {"$in": existing}}, {"_id": 1})}
+    others = [applied_id for applied_id in existing if applied_id not in entry_ids][-TRAIT_ENTRY_IDS_KEPT:]
+    room = TRAIT_ENTRY_IDS_KEPT - len(others)
+    return others + (recent_entry_ids[-room:] if room else [])
+
+def replay_user(user_id: ObjectId) -> Tuple[ObjectId, Optional[int]]:
+    """Replay one user's entries; returns (user_id, entries replayed), or None if the user was skipped"""
+    for attempt in range(REPLAY_ATTEMPTS):
+        user = _db.users.find_one({"_id": user_id}, {"traits": 1, "trait_entry_ids": 1, "updated_at": 1})
+        if not user:
+            return user_id, 0
+        replayed = _replay(user)
+        if replayed is not None:
+            return user_id, replayed
+        print(f"User {user_id} changed during replay (attempt {attempt + 1} of {REPLAY_ATTEMPTS})")
+    print(f"Skipping user {user_id}; stop the trait workers and re-run with the same --run-id")
+    return user_id, None
+
+def _replay(user: Dict) -> Optional[int]:
+    """Rewrite one user's history and traits; None if their traits changed meanwhile"""
+    user_id = user["_id"]
+    traits = _initial_traits(user)
+    cursor = _db.journal_entries.find(
+        {"user_id": user_id},
+        {"content": 1, "created_at": 1}
+    ).sort([("created_at", 1), ("_id", 1)]).batch_size(_chunk_size)
+
+    # Staged from scratch, and the existing history is later replaced wholesale, so re-running
+    # a user is idempotent. Imported entries are replayed one by one too, so their import
+    # records are replaced along with the rest
+    operations = [DeleteMany({"user_id": user_id})]
+    recent_entry_ids: List[ObjectId] = []
+    replayed = 0
+    chunk: List[Dict] = []
+
+    def flush(entries: List[Dict]):
+        nonlocal traits, operations, replayed
+        adjustments = _analyzer.analyze_batch([entry["content"] for entry in entries])
+        for entry, row in zip(entries, adjustments):
+            new_traits, final_adjustments = apply_trait_adjustments(
+                traits, dict(zip(TRAITS, row.tolist())), _smoothing
+            )
+            operations.append(InsertOne({
+                "user_id": user_id,
+                "traits": new_traits,
+                "previous_traits": traits,
+                "adjustments": final_adjustments,
+                "updated_at": entry["created_at"],
+                "trigger_entry_id": entry["_id"],
+                "trigger_entry_content": entry["content"][:200],
+                "source": "replay"
+            }))
+            traits = new_traits
+            recent_entry_ids.append(entry["_id"])
+        del recent_entry_ids[:-50]
+        replayed += len(entries)
+        if not _dry_run:
+            _db.trait_history_replay.bulk_write(operations, ordered=True)
+        operations = []
+
+    for entry in cursor:
+        chunk.append(entry)
+        if len(chunk) >= _chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk or operations:
+        flush(chunk)
+
+    if not _dry_run:
+        result = _db.users.update_one(
+            {"_id": user_id, "updated_at": user.get("updated_at")},
+            {
+                "$set": {
+                    "traits": traits,
+                    "trait_entry_ids": _kept_trait_ids(user, recent_entry_ids),
+                    "updated_at": datetime.utcnow()
+                },
+                # Staged by a trait update whose history the replay has just rewritten
+                "$unset": {"pending_trait_history": ""}
+            }
+        )
+        if result.matched_count == 0:
+            _db.trait_history_replay.delete_many({"user_id": user_id})
+            return None
+        _swap_history(user_id)
+        # Same as dashboard_summaries.touch(): the stored dashboard shows the old traits
+        _db.dashboard_summaries.update_one({"_id": user_id}, {"$inc": {"version": 1}}, upsert=True)
+    return replayed
+
+def _pending_users(db, run_id: str, only: Optional[List[str]]) -> List[ObjectId]:
+    query = {"_id": {"$in": [ObjectId(user_id) for user_id in only]}} if only else {}
+    user_ids = [user["_id"] for user in db.users.find(query, {"_id": 1})]
+    done = {
+        record["user_id"]
+        for record in db.trait_replay_progress.find({"run_id": run_id}, {"user_id": 1})
+    }
+    return [user_id for user_id in user_ids if user_id not in done]
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay trait history from journal entries")
+    parser.add_argument("--run-id", default="replay", help="checkpoint key; reuse it to resume an interrupted run")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--smoothing", type=float, default=TRAIT_SMOOTHING)
+    parser.add_argument("--chunk-size", type=int, default=500, help="entries scored and written per batch")
+    parser.add_argument("--user", action="append", help="only replay this user id (repeatable)")
+    parser.add_argument("--restart", action="store_true", help="discard checkpoints for --run-id first")
+    parser.add_argument("--dry-run", action="store_true", help="compute without writing anything")
+    args = parser.parse_args(argv)
+
+    uri = os.getenv("MONGODB_URI")
+    db = MongoClient(uri, server_api=ServerApi('1')).kiraai
+
+    if args.restart and not args.dry_run:
+        db.trait_replay_progress.delete_many({"run_id": args.run_id})
+
+    user_ids = _pending_users(db, args.run_id, args.user)
+    total = len(user_ids)
+    print(f"Replaying {total} users with {args.workers} workers (run '{args.run_id}', smoothing {args.smoothing})")
+
+    started = time.monotonic()
+    users_done = 0
+    entries_done = 0
+    skipped = 0
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(uri, args.smoothing, args.chunk_size, args.dry_run)
+    ) as pool:
+        futures = [pool.submit(replay_user, user_id) for user_id in user_ids]
+        for future in as_completed(futures):
+            user_id, replayed = future.result()
+            users_done += 1
+            if replayed is None:
+                skipped += 1
+                continue
+            if not args.dry_run:
+                db.trait_replay_progress.update_one(
+                    {"run_id": args.run_id, "user_id": user_id},
+                    {"$set": {"entries": replayed, "finished_at": datetime.utcnow()}},
+                    upsert=True
+                )
+
+            entries_done += replayed
+            elapsed = time.monotonic() - started
+            rate = entries_done / elapsed if elapsed else 0.0
+            eta = elapsed / users_done * (total - users_done)
+            print(f"[{users_done}/{total}] {entries_done} entries, {rate:.0f} entries/s, ETA {eta:.0f}s")
+
+    print(f"Done in {time.monotonic() - started:.1f}s")
+    if skipped:
+        print(f"{skipped} users skipped after repeated conflicts; re-run with --run-id {args.run_id} to finish them")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+from .journal import JournalRepository, journal_repository, ENTRY_PROJECTION, SUMMARY_PROJECTION, content_summary
+from .users import UserRepository, user_repository
+from .trait_history import TraitHistoryRepository, trait_history_repository
+from .strategic_plans import StrategicPlanRepository, plan_repository, PLAN_PROJECTION
+
+__all__ = [
+    "JournalRepository", "journal_repository", "ENTRY_PROJECTION", "SUMMARY_PROJECTION", "content_summary",
+    "UserRepository", "user_repository",
+    "TraitHistoryRepository", "trait_history_repository",
+    "StrategicPlanRepository", "plan_repository", "PLAN_PROJECTION"
+]
\ No newline at end of file
@@ -0,0 +1,187 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo import UpdateOne
+from database import get_database
+from utils.pagination import keyset_filter
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+JOURNAL_PREVIEW_CHARS = int(os.getenv("JOURNAL_PREVIEW_CHARS", "200"))
+
+# Fields needed to build a JournalEntryResponse
+ENTRY_PROJECTION = {
+    "title": 1,
+    "content": 1,
+    "mood_rating": 1,
+    "tags": 1,
+    "created_at": 1,
+    "updated_at": 1
+}
+
+# Fields needed to build a JournalEntrySummary; content stays on the server
+SUMMARY_PROJECTION = {
+    "title": 1,
+    "preview": 1,
+    "word_count": 1,
+    "mood_rating": 1,
+    "tags": 1,
+    "created_at": 1,
+    "updated_at": 1
+}
+
+def content_summary(content: str) -> Dict:
+    """Preview and word count stored alongside the content so list views can skip it"""
+    preview = content
+    if len(content) > JOURNAL_PREVIEW_CHARS:
+        cut = content[:JOURNAL_PREVIEW_CHARS]
+        # Break on the last word boundary unless that would drop most of the preview
+        space = cut.rfind(" ")
+        preview = (cut[:space] if space > JOURNAL_PREVIEW_CHARS // 2 else cut).rstrip() + "…"
+    return {"preview": preview, "word_count": len(content.split())}
+
+class JournalRepository:
+    """Data access for the journal_entries collection"""
+
+    @property
+    def collection(self):
+        return get_database().journal_entries
+
+    async def create(self, user_id: ObjectId, fields: Dict) -> Dict:
+        """Insert an entry and return the stored document without reading it back"""
+        now = datetime.utcnow()
+        doc = {"user_id": user_id, **fields, **content_summary(fields["content"]), "created_at": now, "updated_at": now}
+        result = await self.collection.insert_one(doc)
+        doc["_id"] = result.inserted_id
+        return doc
+
+    async def insert_many(self, user_id: ObjectId, entries: List[Dict], import_id: ObjectId) -> int:
+        """Insert a chunk of imported entries tagged with their import; entries may carry their own dates"""
+        if not entries:
+            return 0
+        now = datetime.utcnow()
+        docs = []
+        for fields in entries:
+            created_at = fields.get("created_at") or now
+            updated_at = fields.get("updated_at") or created_at
+            docs.append({
+                "user_id": user_id,
+                **fields,
+                **content_summary(fields["content"]),
+                "created_at": created_at,
+                "updated_at": updated_at,
+                "import_id": import_id
+            })
+        result = await self.collection.insert_many(docs, ordered=False)
+        return len(result.inserted_ids)
+
+    async def get(self, user_id: ObjectId, entry_id: ObjectId, projection: Optional[Dict] = ENTRY_PROJECTION) -> Optional[Dict]:
+        return await self.collection.find_one({"_id": entry_id, "user_id": user_id}, projection)
+
+    async def get_many(self, user_id: ObjectId, entry_ids: List[ObjectId], projection: Optional[Dict] = ENTRY_PROJECTION) -> List[Dict]:
+        """Entries by id, in the order the ids were given"""
+        docs = await self.collection.find(
+            {"_id": {"$in": entry_ids}, "user_id": user_id},
+            projection
+        ).to_list(length=len(entry_ids))
+        by_id = {doc["_id"]: doc for doc in docs}
+        return [by_id[entry_id] for entry_id in entry_ids if entry_id in by_id]
+
+    async def list(self, user_id: ObjectId, after: Optional[str] = None, skip: int = 0, limit: int = 20, summary: bool = False) -> List[Dict]:
+        """Entries newest first, starting after the keyset cursor if given.
+
+        With summary=True entries carry preview and word_count instead of content.
+        """
+        query = {"user_id": user_id, **keyset_filter("created_at", after)}
+        cursor = self.collection.find(query, SUMMARY_PROJECTION if summary else ENTRY_PROJECTION).sort(
+            [("created_at", -1), ("_id", -1)]
+        ).skip(skip).limit(limit)
+        docs = await cursor.to_list(length=limit)
+        if summary:
+            await self._fill_summaries(docs)
+        return docs
+
+    async def _fill_summaries(self, docs: List[Dict]):
+        """Compute and store summaries for entries written before previews existed"""
+        missing = [doc["_id"] for doc in docs if "preview" not in doc]
+        if not missing:
+            return
+        contents = {
+            doc["_id"]: doc.get("content", "")
+            async for doc in self.collection.find({"_id": {"$in": missing}}, {"content": 1})
+        }
+        updates = []
+        for doc in docs:
+            if doc["_id"] in contents:
+                summary = content_summary(contents[doc["_id"]])
+                doc.update(summary)
+                updates.append(UpdateOne({"_id": doc["_id"], "preview": {"$exists": False}}, {"$set": summary}))
+        if updates:
+            await self.collection.bulk_write(updates, ordered=False)
+
+    async def search(
+        self,
+        user_id: ObjectId,
+        query: Optional[str],
+        tags: List[str],
+        start: Optional[datetime],
+        end: Optional[datetime],
+        skip: int = 0,
+        limit: int = 20
+    ) -> List[Tuple[Dict, float]]:
+        """Text-index search ranked by textScore; without a query, filtered entries newest first"""
+        filters: Dict = {"user_id": user_id}
+        if tags:
+            filters["tags"] = {"$all": tags}
+        if start or end:
+            filters["created_at"] = {
+                **({"$gte": start} if start else {}),
+                **({"$lte": end} if end else {})
+            }
+
+        if query:
+            filters["$text"] = {"$search": query}
+            cursor = self.collection.find(
+                filters,
+                {**ENTRY_PROJECTION, "score": {"$meta": "textScore"}}
+            ).sort([("score", {"$meta": "textScore"}), ("created_at", -1)])
+        else:
+            cursor = self.collection.find(filters, ENTRY_PROJECTION).sort([("created_at", -1), ("_id", -1)])
+
+        docs = await cursor.skip(skip).limit(limit).to_list(length=limit)
+        return [(doc, doc.pop("score", 0.0)) for doc in docs]
+
+    async def recent(self, user_id: ObjectId, since: datetime, limit: int, projection: Optional[Dict] = None) -> List[Dict]:
+        cursor = self.collection.find(
+            {"user_id": user_id, "created_at": {"$gte": since}},
+            projection
+        ).sort("created_at", -1).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def update(self, user_id: ObjectId, entry_id: ObjectId, fields: Dict) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """Apply the changes and return the entry (before, after), or (None, None) if the user has no such entry"""
+        changes = {**fields, "updated_at": datetime.utcnow()}
+        if "content" in fields:
+            changes.update(content_summary(fields["content"]))
+        # The previous version feeds incremental stats; the new one is just the previous plus the changes
+        before = await self.collection.find_one_and_update(
+            {"_id": entry_id, "user_id": user_id},
+            {"$set": changes},
+            projection=ENTRY_PROJECTION,
+            return_document=ReturnDocument.BEFORE
+        )
+        if before is None:
+            return None, None
+        return before, {**before, **changes}
+
+    async def delete(self, user_id: ObjectId, entry_id: ObjectId) -> Optional[Dict]:
+        """Delete an entry, returning it, or None if the user has no such entry"""
+        return await self.collection.find_one_and_delete(
+            {"_id": entry_id, "user_id": user_id},
+            projection={"content": 1, "mood_rating": 1, "created_at": 1}
+        )
+
+journal_repository = JournalRepository()
\ No newline at end of file
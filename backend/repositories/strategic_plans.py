@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from bson import ObjectId
+from database import get_database
+from utils.pagination import keyset_filter
+
+# Fields needed to build a StrategicPlanResponse; based_on_entries is left out
+PLAN_PROJECTION = {
+    "title": 1,
+    "analysis": 1,
+    "recommendations": 1,
+    "zen_insight": 1,
+    "generated_at": 1
+}
+
+class StrategicPlanRepository:
+    """Data access for the strategic_plans collection"""
+
+    @property
+    def collection(self):
+        return get_database().strategic_plans
+
+    async def create(self, user_id: ObjectId, fields: Dict) -> Dict:
+        """Insert a plan and return the stored document without reading it back"""
+        doc = {"user_id": user_id, **fields, "generated_at": datetime.utcnow()}
+        result = await self.collection.insert_one(doc)
+        doc["_id"] = result.inserted_id
+        return doc
+
+    async def latest(self, user_id: ObjectId) -> Optional[Dict]:
+        """The user's newest plan, with the fingerprint of the input it was generated from"""
+        return await self.collection.find_one(
+            {"user_id": user_id},
+            {**PLAN_PROJECTION, "input_fingerprint": 1},
+            sort=[("generated_at", -1), ("_id", -1)]
+        )
+
+    async def history(self, user_id: ObjectId, after: Optional[str] = None, skip: int = 0, limit: int = 10) -> List[Dict]:
+        """Plans newest first, starting after the keyset cursor if given"""
+        query = {"user_id": user_id, **keyset_filter("generated_at", after)}
+        cursor = self.collection.find(query, PLAN_PROJECTION).sort(
+            [("generated_at", -1), ("_id", -1)]
+        ).skip(skip).limit(limit)
+        return await cursor.to_list(length=limit)
+
+plan_repository = StrategicPlanRepository()
\ No newline at end of file
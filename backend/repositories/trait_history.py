@@ -0,0 +1,101 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+from database import get_database
+from utils.lexicon import TRAITS
+
+def truncate_date(moment: datetime, unit: str) -> datetime:
+    """Start of the day, ISO week (Monday) or month containing moment, matching $dateTrunc"""
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if unit == "week":
+        return day - timedelta(days=day.weekday())
+    if unit == "month":
+        return day.replace(day=1)
+    return day
+
+class TraitHistoryRepository:
+    """Data access for the trait_history collection"""
+
+    @property
+    def collection(self):
+        return get_database().trait_history
+
+    async def recent(self, user_id: ObjectId, limit: int = 50) -> List[Dict]:
+        cursor = self.collection.find(
+            {"user_id": user_id},
+            {"_id": 0, "traits": 1, "updated_at": 1, "trigger_entry_id": 1}
+        ).sort("updated_at", -1).limit(limit)
+        history = await cursor.to_list(length=limit)
+        for record in history:
+            record.setdefault("trigger_entry_id", None)
+        return history
+
+    async def buckets(self, user_id: ObjectId, unit: str, since: Optional[datetime] = None) -> List[Dict]:
+        """Average traits per day, week or month, oldest first.
+
+        Each bucket has the bucket start as updated_at, the number of updates
+        it covers and the entry that triggered its latest update.
+        """
+        match: Dict = {"user_id": user_id}
+        if since is not None:
+            match["updated_at"] = {"$gte": since}
+
+        pipeline = [
+            {"$match": match},
+            {"$sort": {"updated_at": 1}},
+            {"$group": {
+                "_id": {"$dateTrunc": {"date": "$updated_at", "unit": unit, "startOfWeek": "monday"}},
+                **{trait: {"$avg": f"$traits.{trait}"} for trait in TRAITS},
+                "updates": {"$sum": 1},
+                "trigger_entry_id": {"$last": "$trigger_entry_id"}
+            }},
+            {"$sort": {"_id": 1}},
+            {"$project": {
+                "_id": 0,
+                "updated_at": "$_id",
+                "traits": {trait: f"${trait}" for trait in TRAITS},
+                "updates": 1,
+                "trigger_entry_id": 1
+            }}
+        ]
+        try:
+            return await self.collection.aggregate(pipeline).to_list(length=None)
+        # $dateTrunc needs MongoDB 5.0; older servers and in-memory substitutes bucket here instead
+        except (OperationFailure, NotImplementedError):
+            return await self._buckets_locally(match, unit)
+
+    async def _buckets_locally(self, match: Dict, unit: str) -> List[Dict]:
+        groups: "OrderedDict[datetime, Dict]" = OrderedDict()
+        cursor = self.collection.find(
+            match,
+            {"_id": 0, "traits": 1, "updated_at": 1, "trigger_entry_id": 1}
+        ).sort("updated_at", 1)
+        async for record in cursor:
+            start = truncate_date(record["updated_at"], unit)
+            group = groups.get(start)
+            if group is None:
+                group = groups[start] = {"sums": dict.fromkeys(TRAITS, 0.0), "counts": dict.fromkeys(TRAITS, 0), "updates": 0}
+            for trait in TRAITS:
+                value = record.get("traits", {}).get(trait)
+                if value is not None:
+                    group["sums"][trait] += value
+                    group["counts"][trait] += 1
+            group["updates"] += 1
+            group["trigger_entry_id"] = record.get("trigger_entry_id")
+
+        return [
+            {
+                "updated_at": start,
+                "traits": {
+                    trait: group["sums"][trait] / group["counts"][trait] if group["counts"][trait] else None
+                    for trait in TRAITS
+                },
+                "updates": group["updates"],
+                "trigger_entry_id": group["trigger_entry_id"]
+            }
+            for start, group in groups.items()
+        ]
+
+trait_history_repository = TraitHistoryRepository()
\ No newline at end of file
@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import Dict, Optional
+from bson import ObjectId
+from database import get_database
+
+# Fields login needs to verify a password and issue a token
+LOGIN_PROJECTION = {"username": 1, "hashed_password": 1}
+# Fields shown on the profile and dashboard
+PROFILE_PROJECTION = {"username": 1, "email": 1, "traits": 1, "created_at": 1}
+
+class UserRepository:
+    """Data access for the users collection"""
+
+    @property
+    def collection(self):
+        return get_database().users
+
+    async def exists(self, username: str, email: str) -> bool:
+        doc = await self.collection.find_one(
+            {"$or": [{"username": username}, {"email": email}]},
+            {"_id": 1}
+        )
+        return doc is not None
+
+    async def create(self, fields: Dict) -> Dict:
+        """Insert a user and return the stored document without reading it back"""
+        now = datetime.utcnow()
+        doc = {**fields, "created_at": now, "updated_at": now}
+        result = await self.collection.insert_one(doc)
+        doc["_id"] = result.inserted_id
+        return doc
+
+    async def get_for_login(self, username: str) -> Optional[Dict]:
+        return await self.collection.find_one({"username": username}, LOGIN_PROJECTION)
+
+    async def get_profile(self, user_id: ObjectId) -> Optional[Dict]:
+        """Read straight from the database, bypassing the per-process user cache"""
+        return await self.collection.find_one({"_id": user_id}, PROFILE_PROJECTION)
+
+user_repository = UserRepository()
\ No newline at end of file
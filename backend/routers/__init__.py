@@ -1,3 +1,3 @@
-from . import auth, journal, traits, strategic_plan
+from . import auth, journal, traits, strategic_plan, dashboard
 
-__all__ = ["auth", "journal", "traits", "strategic_plan"]
\ No newline at end of file
+__all__ = ["auth", "journal", "traits", "strategic_plan", "dashboard"]
\ No newline at end of file
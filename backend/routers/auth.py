@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer
 from models.user import UserCreate, UserResponse, Token, User
-from utils.auth import get_password_hash, verify_password, create_access_token, get_current_user
-from database import get_database
+from utils.auth import password_hasher, create_access_token, get_current_user
+from repositories import user_repository
 from datetime import timedelta
 import os
 from dotenv import load_dotenv
@@ -14,17 +14,14 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 @router.post("/register", response_model=UserResponse)
 async def register(user: UserCreate):
-    db = get_database()
-    
-    existing_user = await db.users.find_one({"$or": [{"username": user.username}, {"email": user.email}]})
-    if existing_user:
+    if await user_repository.exists(user.username, user.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username or email already registered"
         )
     
-    hashed_password = get_password_hash(user.password)
-    user_doc = {
+    hashed_password = await password_hasher.hash(user.password)
+    created_user = await user_repository.create({
         "username": user.username,
         "email": user.email,
         "hashed_password": hashed_password,
@@ -35,10 +32,7 @@ async def register(user: UserCreate):
             "agreeableness": 5.0,
             "neuroticism": 5.0
         }
-    }
-    
-    result = await db.users.insert_one(user_doc)
-    created_user = await db.users.find_one({"_id": result.inserted_id})
+    })
     
     return UserResponse(
         id=str(created_user["_id"]),
@@ -50,10 +44,9 @@ async def register(user: UserCreate):
 
 @router.post("/login", response_model=Token)
 async def login(username: str, password: str):
-    db = get_database()
-    user = await db.users.find_one({"username": username})
+    user = await user_repository.get_for_login(username)
     
-    if not user or not verify_password(password, user["hashed_password"]):
+    if not user or not await password_hasher.verify(password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -62,7 +55,7 @@ async def login(username: str, password: str):
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user["username"]}, expires_delta=access_token_expires
+        data={"sub": user["username"], "uid": str(user["_id"])}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from typing import Dict
+from bson import ObjectId
+from models.user import BigFiveTraits, User
+from utils.auth import get_current_user
+from utils.dashboard import dashboard_summaries
+from utils.journal_stats import journal_stats
+from utils.serialization import document_fields, json_response
+from repositories import journal_repository, plan_repository, trait_history_repository, user_repository
+from routers.journal import SUMMARY_FIELDS, SUMMARY_DEFAULTS
+from routers.strategic_plan import PLAN_FIELDS, PLAN_DEFAULTS
+from datetime import datetime, timedelta
+import asyncio
+
+router = APIRouter()
+
+DASHBOARD_ENTRIES = 5
+DASHBOARD_HISTORY_WEEKS = 12
+# Browsers keep the body but check back on every load, per user
+CACHE_HEADERS = {"Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+async def _build_dashboard(user_id: ObjectId) -> Dict:
+    # The profile is read fresh rather than from current_user: the user cache may
+    # lag another worker's trait update, and the payload is stored under the new version
+    profile, entries, history, plans, stats = await asyncio.gather(
+        user_repository.get_profile(user_id),
+        journal_repository.list(user_id, limit=DASHBOARD_ENTRIES, summary=True),
+        trait_history_repository.buckets(user_id, "week", since=datetime.utcnow() - timedelta(weeks=DASHBOARD_HISTORY_WEEKS)),
+        plan_repository.history(user_id, limit=1),
+        journal_stats.get(user_id)
+    )
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return {
+        "user": {
+            "id": str(user_id),
+            "username": profile["username"],
+            "email": profile["email"],
+            "created_at": profile.get("created_at")
+        },
+        "traits": BigFiveTraits(**(profile.get("traits") or {})).dict(),
+        "recent_entries": [document_fields(entry, SUMMARY_FIELDS, SUMMARY_DEFAULTS) for entry in entries],
+        "trait_history": history,
+        "latest_plan": document_fields(plans[0], PLAN_FIELDS, PLAN_DEFAULTS) if plans else None,
+        "journal": journal_stats.summarize(stats, window_days=30)
+    }
+
+@router.get("")
+async def get_dashboard(request: Request, current_user: User = Depends(get_current_user)):
+    """Everything the dashboard shows in one response: profile, traits, recent
+    entries, weekly trait history, latest plan and 30-day journal analysis.
+
+    Served from the user's materialized summary and revalidated with ETag /
+    If-None-Match, answering 304 while nothing has changed.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        etag = dashboard_summaries.etag(current_user.id, await dashboard_summaries.version(current_user.id))
+        if etag in (tag.strip() for tag in if_none_match.split(",")):
+            dashboard_summaries.not_modified += 1
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, **CACHE_HEADERS})
+
+    version, data = await dashboard_summaries.get(current_user.id, lambda: _build_dashboard(current_user.id))
+    response = json_response(data)
+    response.headers.update({"ETag": dashboard_summaries.etag(current_user.id, version), **CACHE_HEADERS})
+    return response
@@ -1,84 +1,181 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
-from models.journal import JournalEntry, JournalEntryCreate, JournalEntryUpdate, JournalEntryResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from typing import Dict, List, Optional, Union
+from models.journal import JournalEntry, JournalEntryCreate, JournalEntryUpdate, JournalEntryResponse, JournalEntrySummary, JournalSearchResult, TraitUpdateStatus, JournalImportStatus
 from models.user import User
 from utils.auth import get_current_user
-from database import get_database
+from utils.trait_queue import trait_queue, JOB_PENDING, JOB_DONE, JOB_IMPORT
+from utils.pagination import set_next_cursor
+from utils.serialization import documents_response
+from utils.journal_stats import journal_stats
+from utils.search import journal_search, local_search_index
+from utils.similarity import similarity_index
+from utils.dashboard import dashboard_summaries
+from utils.journal_import import journal_importer, IMPORT_FAILED
+from repositories import journal_repository
 from bson import ObjectId
 from datetime import datetime
+import asyncio
 
 router = APIRouter()
 
+# JournalEntryResponse fields, in order, for the serialized list path
+ENTRY_FIELDS = ("title", "content", "mood_rating", "tags", "created_at", "updated_at", "trait_status")
+ENTRY_DEFAULTS = {"tags": []}
+SUMMARY_FIELDS = ("title", "preview", "word_count", "mood_rating", "tags", "created_at", "updated_at")
+SUMMARY_DEFAULTS = {"tags": [], "preview": "", "word_count": 0}
+
+def _entry_response(entry: Dict, trait_status: Optional[str] = None) -> JournalEntryResponse:
+    return JournalEntryResponse(
+        id=str(entry["_id"]),
+        title=entry["title"],
+        content=entry["content"],
+        mood_rating=entry.get("mood_rating"),
+        tags=entry["tags"],
+        created_at=entry["created_at"],
+        updated_at=entry["updated_at"],
+        trait_status=trait_status
+    )
+
+async def _record_stats(user_id: ObjectId, before: Optional[Dict] = None, after: Optional[Dict] = None):
+    # The entry write already succeeded, so a stats failure only marks the stats for a rebuild
+    try:
+        await journal_stats.record(user_id, before=before, after=after)
+    except Exception as e:
+        print(f"Error updating journal stats: {e}")
+        await journal_stats.invalidate(user_id)
+
 @router.post("/", response_model=JournalEntryResponse)
 async def create_journal_entry(
     entry: JournalEntryCreate, 
     current_user: User = Depends(get_current_user)
 ):
-    db = get_database()
-    
-    entry_doc = {
-        "user_id": current_user.id,
+    created_entry = await journal_repository.create(current_user.id, {
         "title": entry.title,
         "content": entry.content,
         "mood_rating": entry.mood_rating,
-        "tags": entry.tags,
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
-    }
-    
-    result = await db.journal_entries.insert_one(entry_doc)
-    created_entry = await db.journal_entries.find_one({"_id": result.inserted_id})
+        "tags": entry.tags
+    })
     
-    from utils.traits import update_traits_from_entry
-    await update_traits_from_entry(current_user.id, entry.content)
+    # Trait analysis runs in the background worker pool, not on the request path
+    await trait_queue.enqueue(created_entry["_id"], current_user.id)
+    await _record_stats(current_user.id, after=created_entry)
+    local_search_index.add(current_user.id, created_entry)
+    similarity_index.add(current_user.id, created_entry)
+    await dashboard_summaries.touch(current_user.id)
     
-    return JournalEntryResponse(
-        id=str(created_entry["_id"]),
-        title=created_entry["title"],
-        content=created_entry["content"],
-        mood_rating=created_entry.get("mood_rating"),
-        tags=created_entry["tags"],
-        created_at=created_entry["created_at"],
-        updated_at=created_entry["updated_at"]
-    )
+    return _entry_response(created_entry, trait_status=JOB_PENDING)
 
-@router.get("/", response_model=List[JournalEntryResponse])
+@router.get("/", response_model=Union[List[JournalEntryResponse], List[JournalEntrySummary]])
 async def get_journal_entries(
     skip: int = 0,
     limit: int = 20,
+    after: Optional[str] = None,
+    view: str = Query(default="full", pattern="^(full|summary)$"),
+    current_user: User = Depends(get_current_user)
+):
+    """List entries newest first. Pass the X-Next-Cursor header value as `after` for the next page;
+    `skip` is kept for older clients. `view=summary` returns a preview and word count instead of content."""
+    summary = view == "summary"
+    docs = await journal_repository.list(current_user.id, after=after, skip=skip, limit=limit, summary=summary)
+    
+    # Documents already have the response shape; encode them directly instead of building models
+    if summary:
+        response = documents_response(docs, SUMMARY_FIELDS, SUMMARY_DEFAULTS)
+    else:
+        response = documents_response(docs, ENTRY_FIELDS, ENTRY_DEFAULTS)
+    set_next_cursor(response, docs, "created_at", limit)
+    return response
+
+@router.get("/search", response_model=List[JournalSearchResult])
+async def search_journal_entries(
+    q: Optional[str] = None,
+    tags: List[str] = Query(default=[]),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = Query(default=20, le=100),
     current_user: User = Depends(get_current_user)
 ):
-    db = get_database()
-    
-    cursor = db.journal_entries.find(
-        {"user_id": current_user.id}
-    ).sort("created_at", -1).skip(skip).limit(limit)
-    
-    entries = []
-    async for entry in cursor:
-        entries.append(JournalEntryResponse(
-            id=str(entry["_id"]),
-            title=entry["title"],
-            content=entry["content"],
-            mood_rating=entry.get("mood_rating"),
-            tags=entry["tags"],
-            created_at=entry["created_at"],
-            updated_at=entry["updated_at"]
-        ))
-    
-    return entries
+    """Search entries by text in title and content, by tags (all must match) and by creation date.
+    Results are ranked by relevance, or newest first when `q` is empty."""
+    results = await journal_search.search(
+        current_user.id,
+        query=q.strip() if q else None,
+        tags=tags,
+        start=start,
+        end=end,
+        skip=skip,
+        limit=limit
+    )
+    
+    return [
+        JournalSearchResult(**_entry_response(entry).dict(), score=round(score, 4))
+        for entry, score in results
+    ]
+
+def _import_status(doc: Dict, trait_status: Optional[str] = None) -> JournalImportStatus:
+    return JournalImportStatus(
+        id=str(doc["_id"]),
+        status=doc["status"],
+        format=doc.get("format"),
+        received=doc.get("received", 0),
+        imported=doc.get("imported", 0),
+        rejected=doc.get("rejected", 0),
+        errors=doc.get("errors", []),
+        trait_status=trait_status,
+        created_at=doc["created_at"],
+        updated_at=doc["updated_at"],
+        finished_at=doc.get("finished_at")
+    )
+
+@router.post("/import", response_model=JournalImportStatus)
+async def import_journal_entries(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """Bulk-import entries from the request body, streamed as NDJSON or a JSON array.
+
+    Each record has the fields of a new entry, plus optional created_at and
+    updated_at to keep its original dates. Invalid records are skipped and
+    reported; poll GET /imports for progress while a large upload runs.
+    """
+    result = await journal_importer.run(current_user.id, request.stream())
+    
+    trait_status = None
+    if result["imported"]:
+        # One trait job for the whole import instead of one LLM call per entry
+        await trait_queue.enqueue(result["_id"], current_user.id, kind=JOB_IMPORT)
+        trait_status = JOB_PENDING
+        # Cheaper to rebuild these from scratch than to apply thousands of single-entry updates
+        await journal_stats.invalidate(current_user.id)
+        local_search_index.invalidate(current_user.id)
+        similarity_index.invalidate(current_user.id)
+        await dashboard_summaries.touch(current_user.id)
+    
+    if result["status"] == IMPORT_FAILED:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{result['error']} ({result['imported']} entries imported before this, import {result['_id']})"
+        )
+    
+    return _import_status(result, trait_status)
+
+@router.get("/imports", response_model=List[JournalImportStatus])
+async def get_journal_imports(
+    limit: int = Query(default=10, ge=1, le=50),
+    current_user: User = Depends(get_current_user)
+):
+    """Recent imports newest first, including any still receiving"""
+    docs = await journal_importer.history(current_user.id, limit)
+    jobs = await asyncio.gather(*(trait_queue.get_status(doc["_id"]) for doc in docs))
+    return [_import_status(doc, job["status"] if job else None) for doc, job in zip(docs, jobs)]
 
 @router.get("/{entry_id}", response_model=JournalEntryResponse)
 async def get_journal_entry(
     entry_id: str,
     current_user: User = Depends(get_current_user)
 ):
-    db = get_database()
-    
-    entry = await db.journal_entries.find_one({
-        "_id": ObjectId(entry_id),
-        "user_id": current_user.id
-    })
+    entry = await journal_repository.get(current_user.id, ObjectId(entry_id))
     
     if not entry:
         raise HTTPException(
@@ -86,35 +183,66 @@ async def get_journal_entry(
             detail="Journal entry not found"
         )
     
-    return JournalEntryResponse(
-        id=str(entry["_id"]),
-        title=entry["title"],
-        content=entry["content"],
-        mood_rating=entry.get("mood_rating"),
-        tags=entry["tags"],
-        created_at=entry["created_at"],
-        updated_at=entry["updated_at"]
-    )
+    return _entry_response(entry)
 
-@router.put("/{entry_id}", response_model=JournalEntryResponse)
-async def update_journal_entry(
+@router.get("/{entry_id}/related", response_model=List[JournalSearchResult])
+async def get_related_entries(
     entry_id: str,
-    entry_update: JournalEntryUpdate,
+    k: int = Query(default=5, ge=1, le=20),
     current_user: User = Depends(get_current_user)
 ):
-    db = get_database()
+    """Entries most similar to this one by TF-IDF cosine similarity, best match first"""
+    entry = await journal_repository.get(current_user.id, ObjectId(entry_id), {"title": 1, "content": 1})
     
-    existing_entry = await db.journal_entries.find_one({
-        "_id": ObjectId(entry_id),
-        "user_id": current_user.id
-    })
+    if not entry:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Journal entry not found"
+        )
+    
+    neighbours = await similarity_index.related(current_user.id, entry, k)
+    scores = dict(neighbours)
+    related = await journal_repository.get_many(current_user.id, [neighbour_id for neighbour_id, _ in neighbours])
+    
+    return [
+        JournalSearchResult(**_entry_response(related_entry).dict(), score=round(scores[related_entry["_id"]], 4))
+        for related_entry in related
+    ]
+
+@router.get("/{entry_id}/trait-status", response_model=TraitUpdateStatus)
+async def get_trait_update_status(
+    entry_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Report whether the background trait update for an entry has run yet"""
+    entry = await journal_repository.get(current_user.id, ObjectId(entry_id), {"_id": 1, "import_id": 1})
     
-    if not existing_entry:
+    if not entry:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Journal entry not found"
         )
     
+    # Imported entries are analyzed by their import's job
+    job = await trait_queue.get_status(entry.get("import_id", entry["_id"]))
+    if not job:
+        # Entries written before the queue existed were analyzed inline
+        return TraitUpdateStatus(entry_id=entry_id, status=JOB_DONE)
+    
+    return TraitUpdateStatus(
+        entry_id=entry_id,
+        status=job["status"],
+        attempts=job.get("attempts", 0),
+        last_error=job.get("last_error"),
+        updated_at=job.get("updated_at")
+    )
+
+@router.put("/{entry_id}", response_model=JournalEntryResponse)
+async def update_journal_entry(
+    entry_id: str,
+    entry_update: JournalEntryUpdate,
+    current_user: User = Depends(get_current_user)
+):
     update_data = {}
     if entry_update.title is not None:
         update_data["title"] = entry_update.title
@@ -125,41 +253,37 @@ async def update_journal_entry(
     if entry_update.tags is not None:
         update_data["tags"] = entry_update.tags
     
-    update_data["updated_at"] = datetime.utcnow()
+    # Ownership check, update and read-back in a single round trip
+    previous_entry, updated_entry = await journal_repository.update(current_user.id, ObjectId(entry_id), update_data)
     
-    await db.journal_entries.update_one(
-        {"_id": ObjectId(entry_id)},
-        {"$set": update_data}
-    )
+    if not updated_entry:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Journal entry not found"
+        )
     
-    updated_entry = await db.journal_entries.find_one({"_id": ObjectId(entry_id)})
+    await _record_stats(current_user.id, before=previous_entry, after=updated_entry)
+    local_search_index.add(current_user.id, updated_entry)
+    similarity_index.add(current_user.id, updated_entry)
+    await dashboard_summaries.touch(current_user.id)
     
-    return JournalEntryResponse(
-        id=str(updated_entry["_id"]),
-        title=updated_entry["title"],
-        content=updated_entry["content"],
-        mood_rating=updated_entry.get("mood_rating"),
-        tags=updated_entry["tags"],
-        created_at=updated_entry["created_at"],
-        updated_at=updated_entry["updated_at"]
-    )
+    return _entry_response(updated_entry)
 
 @router.delete("/{entry_id}")
 async def delete_journal_entry(
     entry_id: str,
     current_user: User = Depends(get_current_user)
 ):
-    db = get_database()
-    
-    result = await db.journal_entries.delete_one({
-        "_id": ObjectId(entry_id),
-        "user_id": current_user.id
-    })
-    
-    if result.deleted_count == 0:
+    deleted_entry = await journal_repository.delete(current_user.id, ObjectId(entry_id))
+    if not deleted_entry:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Journal entry not found"
         )
     
+    await _record_stats(current_user.id, before=deleted_entry)
+    local_search_index.remove(current_user.id, deleted_entry["_id"])
+    similarity_index.remove(current_user.id, deleted_entry["_id"])
+    await dashboard_summaries.touch(current_user.id)
+    
     return {"message": "Journal entry deleted successfully"}
\ No newline at end of file
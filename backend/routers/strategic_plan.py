@@ -1,18 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Dict
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, List, Dict, Optional, Tuple
 from models.strategic_plan import StrategicPlan, StrategicPlanResponse
 from models.user import User
 from utils.auth import get_current_user
-from database import get_database
+from repositories import journal_repository, plan_repository
 from datetime import datetime, timedelta
-import httpx
+from utils.llm_client import llm_client, LLM_MODEL
+from utils.circuit_breaker import CircuitOpenError
+from utils.llm_cache import llm_cache
+from utils.lexicon import lexicon_index
+from utils.pagination import set_next_cursor
+from utils.serialization import documents_response
+from utils.metrics import record_llm_fallback, record_llm_tokens
+from utils.context_builder import estimate_tokens
+from utils.json_stream import JsonObjectStreamParser
+from utils.journal_stats import journal_stats
+from utils.dashboard import dashboard_summaries
+from utils.single_flight import SingleFlight, LeaseLock
 import os
 from dotenv import load_dotenv
-from collections import Counter
+import hashlib
 import json
+import time
 
 load_dotenv()
 
+# Longest a worker may hold a user's plan lock; covers one LLM call with its retries
+PLAN_LOCK_LEASE_SECONDS = float(os.getenv("PLAN_LOCK_LEASE_SECONDS", "120"))
+
 router = APIRouter()
 
 class StrategicPlanGenerator:
@@ -28,69 +44,9 @@ class StrategicPlanGenerator:
             "Honor both your achievements and your struggles"
         ]
     
-    def analyze_journal_patterns(self, entries: List[Dict]) -> Dict:
-        """Analyze patterns in journal entries"""
-        if not entries:
-            return {"themes": [], "mood_trend": "neutral", "activity_patterns": {}}
-        
-        # Count themes across all entries
-        theme_counter = Counter()
-        mood_scores = []
-        word_frequency = Counter()
-        
-        for entry in entries:
-            content = entry.get("content", "")
-            words = [word.lower() for word in content.split() if len(word) > 3]
-            
-            # Count meaningful words
-            word_frequency.update(words)
-            
-            # Extract and count themes
-            themes = self.extract_themes(content)
-            theme_counter.update(themes)
-            
-            # Track mood ratings
-            if entry.get("mood_rating"):
-                mood_scores.append(entry["mood_rating"])
-        
-        # Simple mood trend calculation
-        mood_trend = "neutral"
-        if len(mood_scores) >= 3:
-            recent_avg = sum(mood_scores[-3:]) / 3
-            overall_avg = sum(mood_scores) / len(mood_scores)
-            if recent_avg > overall_avg + 0.3:
-                mood_trend = "improving"
-            elif recent_avg < overall_avg - 0.3:
-                mood_trend = "declining"
-        
-        return {
-            "themes": [theme for theme, _ in theme_counter.most_common(5)],
-            "mood_trend": mood_trend,
-            "top_words": [word for word, _ in word_frequency.most_common(10)],
-            "entry_count": len(entries)
-        }
-    
     def extract_themes(self, content: str) -> List[str]:
         """Extract themes from journal content using keyword matching"""
-        themes = []
-        content_lower = content.lower()
-        
-        theme_keywords = {
-            "work_stress": ["work", "job", "boss", "deadline", "meeting", "project", "stress", "pressure"],
-            "relationships": ["friend", "family", "partner", "relationship", "love", "conflict", "social"],
-            "health_wellness": ["exercise", "health", "sleep", "tired", "energy", "wellness", "diet"],
-            "personal_growth": ["learn", "growth", "improve", "goal", "achieve", "progress", "develop"],
-            "creativity": ["create", "art", "music", "write", "design", "imagination", "creative"],
-            "anxiety_worry": ["anxious", "worry", "nervous", "fear", "panic", "stress", "overwhelmed"],
-            "happiness_joy": ["happy", "joy", "excited", "grateful", "celebration", "success", "good"],
-            "solitude_reflection": ["alone", "quiet", "reflect", "think", "meditate", "peace", "solitude"]
-        }
-        
-        for theme, keywords in theme_keywords.items():
-            if any(keyword in content_lower for keyword in keywords):
-                themes.append(theme)
-        
-        return themes
+        return lexicon_index.extract_themes(content)
     
     def generate_trait_insights(self, traits, journal_analysis: Dict) -> Dict:
         """Generate trait-specific insights and priorities for strategic planning"""
@@ -163,10 +119,8 @@ class StrategicPlanGenerator:
         
         return insights
     
-    async def generate_strategic_plan(self, user: User, journal_analysis: Dict) -> Dict:
-        """Generate strategic plan using OpenAI API"""
-        api_key = os.getenv("OPENROUTER_API_KEY")
-        
+    def build_plan_prompt(self, user: User, journal_analysis: Dict) -> str:
+        """Build the plan-generation prompt from the user's traits and journal analysis"""
         # Create trait-driven insights for strategic planning
         trait_insights = self.generate_trait_insights(user.traits, journal_analysis)
         
@@ -208,38 +162,98 @@ class StrategicPlanGenerator:
             "zen_insight": "A Zen insight tailored to their personality profile..."
         }}
         """
+        return prompt
+    
+    async def generate_strategic_plan(self, user: User, journal_analysis: Dict) -> Tuple[Dict, bool]:
+        """Generate strategic plan using OpenAI API; returns (plan_data, whether it is the fallback plan)"""
+        prompt = self.build_plan_prompt(user, journal_analysis)
+        
+        cached = await llm_cache.get(LLM_MODEL, prompt)
+        if cached is not None:
+            return cached, False
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "HTTP-Referer": "http://localhost:8000",
-                        "X-Title": "KiraAI"
-                    },
-                    json={
-                        "model": "openai/gpt-4o-mini",
-                        "messages": [{"role": "user", "content": prompt}]
-                    }
-                )
+            started = time.perf_counter()
+            response = await llm_client.chat_completion(
+                [{"role": "user", "content": prompt}],
+                operation="plan"
+            )
+            
+            if response.status_code == 200:
+                result = response.json()
+                record_llm_tokens("plan", estimate_tokens(prompt), result.get("usage"))
+                content = result["choices"][0]["message"]["content"]
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    content = result["choices"][0]["message"]["content"]
-                    
-                    # Parse JSON response
-                    try:
-                        plan_data = json.loads(content)
-                        return plan_data
-                    except json.JSONDecodeError:
-                        # Fallback if JSON parsing fails
-                        return self.create_fallback_plan(user, journal_analysis)
-                else:
-                    return self.create_fallback_plan(user, journal_analysis)
-                    
+                # Parse JSON response
+                try:
+                    plan_data = json.loads(content)
+                    await llm_cache.set(
+                        LLM_MODEL, prompt, plan_data,
+                        latency=time.perf_counter() - started,
+                        tokens=result.get("usage", {}).get("total_tokens", 0)
+                    )
+                    return plan_data, False
+                except json.JSONDecodeError:
+                    # Fallback if JSON parsing fails
+                    record_llm_fallback("plan", "invalid_json")
+                    return self.create_fallback_plan(user, journal_analysis), True
+            else:
+                record_llm_tokens("plan", estimate_tokens(prompt))
+                record_llm_fallback("plan", "http_error")
+                return self.create_fallback_plan(user, journal_analysis), True
+                
+        except CircuitOpenError:
+            record_llm_fallback("plan", "circuit_open")
+            return self.create_fallback_plan(user, journal_analysis), True
         except Exception:
-            return self.create_fallback_plan(user, journal_analysis)
+            record_llm_fallback("plan", "request_error")
+            return self.create_fallback_plan(user, journal_analysis), True
+    
+    async def stream_strategic_plan(self, user: User, journal_analysis: Dict) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream plan generation as ("token", text), ("field", (name, value)) and a final ("plan", (plan_data, fallback)) event"""
+        prompt = self.build_plan_prompt(user, journal_analysis)
+        
+        cached = await llm_cache.get(LLM_MODEL, prompt)
+        if cached is not None:
+            for name, value in cached.items():
+                yield "field", (name, value)
+            yield "plan", (cached, False)
+            return
+        
+        parser = JsonObjectStreamParser()
+        plan_data = {}
+        reason = None
+        started = time.perf_counter()
+        # Streamed responses carry no usage block, so only the estimate is recorded
+        record_llm_tokens("plan", estimate_tokens(prompt))
+        try:
+            async for delta in llm_client.stream_chat_completion(
+                [{"role": "user", "content": prompt}],
+                operation="plan"
+            ):
+                yield "token", delta
+                for name, value in parser.feed(delta):
+                    plan_data[name] = value
+                    yield "field", (name, value)
+        except CircuitOpenError:
+            reason = "circuit_open"
+        except Exception as e:
+            print(f"Error streaming strategic plan: {e}")
+            reason = "request_error"
+        
+        if reason is None and not (parser.done and all(key in plan_data for key in ("title", "analysis", "recommendations"))):
+            reason = "invalid_json"
+        
+        if reason is None:
+            await llm_cache.set(LLM_MODEL, prompt, plan_data, latency=time.perf_counter() - started)
+        else:
+            record_llm_fallback("plan", reason)
+            # Fields already streamed are superseded by the complete fallback plan
+            plan_data = self.create_fallback_plan(user, journal_analysis)
+            for name, value in plan_data.items():
+                yield "field", (name, value)
+        
+        yield "plan", (plan_data, reason is not None)
     
     def create_fallback_plan(self, user: User, analysis: Dict) -> Dict:
         """Create a trait-driven fallback strategic plan if AI generation fails"""
@@ -301,25 +315,24 @@ class StrategicPlanGenerator:
 
 generator = StrategicPlanGenerator()
 
-@router.post("/generate", response_model=StrategicPlanResponse)
-async def generate_strategic_plan(current_user: User = Depends(get_current_user)):
-    """Generate a new strategic plan based on recent journal entries and user traits"""
-    db = get_database()
-    
-    # Get recent journal entries (last 30 days)
+# StrategicPlanResponse fields, in order, for the serialized history path
+PLAN_FIELDS = ("title", "analysis", "recommendations", "generated_at", "zen_insight")
+PLAN_DEFAULTS = {"zen_insight": ""}
+
+def _plan_response(plan: Dict) -> StrategicPlanResponse:
+    return StrategicPlanResponse(
+        id=str(plan["_id"]),
+        title=plan["title"],
+        analysis=plan["analysis"],
+        recommendations=plan["recommendations"],
+        generated_at=plan["generated_at"],
+        zen_insight=plan.get("zen_insight", "")
+    )
+
+async def _load_recent_entries(user: User) -> List[Dict]:
+    """Ids and edit times of the newest 10 journal entries from the last 30 days, which a plan is based on"""
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    cursor = db.journal_entries.find({
-        "user_id": current_user.id,
-        "created_at": {"$gte": thirty_days_ago}
-    }).sort("created_at", -1).limit(20)
-    
-    entries = []
-    async for entry in cursor:
-        entries.append({
-            "content": entry["content"],
-            "mood_rating": entry.get("mood_rating"),
-            "created_at": entry["created_at"]
-        })
+    entries = await journal_repository.recent(user.id, thirty_days_ago, 10, {"_id": 1, "updated_at": 1})
     
     if not entries:
         raise HTTPException(
@@ -327,66 +340,151 @@ async def generate_strategic_plan(current_user: User = Depends(get_current_user)
             detail="No recent journal entries found. Please write some journal entries first."
         )
     
-    # Analyze journal patterns
-    analysis = generator.analyze_journal_patterns(entries)
-    
-    # Generate strategic plan
-    plan_data = await generator.generate_strategic_plan(current_user, analysis)
-    
-    # Store in database
-    entry_ids = []
-    cursor = db.journal_entries.find({
-        "user_id": current_user.id,
-        "created_at": {"$gte": thirty_days_ago}
-    }).sort("created_at", -1).limit(10)
-    
-    async for entry in cursor:
-        entry_ids.append(entry["_id"])
-    
-    strategic_plan = {
-        "user_id": current_user.id,
+    return entries
+
+async def _load_journal_analysis(user: User) -> Dict:
+    """Themes, mood trend and top words read from the incrementally maintained journal stats"""
+    return journal_stats.summarize(await journal_stats.get(user.id), window_days=30)
+
+def _plan_fingerprint(user: User, entries: List[Dict]) -> str:
+    """Identifies a plan's input: the entries it is based on, as last edited, and the user's traits"""
+    parts = [LLM_MODEL, json.dumps(user.traits.dict(), sort_keys=True)]
+    parts.extend(f"{entry['_id']}:{entry.get('updated_at')}" for entry in entries)
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+async def _cached_plan(user: User, fingerprint: str) -> Optional[Dict]:
+    """The latest plan, if it was generated from the same input"""
+    latest = await plan_repository.latest(user.id)
+    if latest is not None and latest.get("input_fingerprint") == fingerprint:
+        return latest
+    return None
+
+async def _store_plan(user: User, plan_data: Dict, entries: List[Dict], fingerprint: str, fallback: bool) -> StrategicPlanResponse:
+    fields = {
         "title": plan_data["title"],
         "analysis": plan_data["analysis"],
         "recommendations": plan_data["recommendations"],
         "zen_insight": plan_data.get("zen_insight", ""),
-        "generated_at": datetime.utcnow(),
-        "based_on_entries": entry_ids
+        "based_on_entries": [entry["_id"] for entry in entries]
     }
+    # A fallback plan is never reused, so the next request tries the LLM again
+    if not fallback:
+        fields["input_fingerprint"] = fingerprint
+    created_plan = await plan_repository.create(user.id, fields)
+    await dashboard_summaries.touch(user.id)
     
-    result = await db.strategic_plans.insert_one(strategic_plan)
-    created_plan = await db.strategic_plans.find_one({"_id": result.inserted_id})
+    return _plan_response(created_plan)
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+# Identical generate requests in this process share one generation
+plan_flights = SingleFlight()
+# One generation per user at a time across workers
+plan_locks = LeaseLock("plan_locks", PLAN_LOCK_LEASE_SECONDS)
+
+async def _generate_locked(user: User, entries: List[Dict], fingerprint: str) -> StrategicPlanResponse:
+    owner = plan_locks.new_owner()
+    while not await plan_locks.acquire(user.id, owner):
+        # Another worker is generating a plan for this user; it may be this very one
+        await plan_locks.wait(user.id)
+        cached = await _cached_plan(user, fingerprint)
+        if cached is not None:
+            return _plan_response(cached)
+    try:
+        analysis = await _load_journal_analysis(user)
+        plan_data, fallback = await generator.generate_strategic_plan(user, analysis)
+        return await _store_plan(user, plan_data, entries, fingerprint, fallback)
+    finally:
+        await plan_locks.release(user.id, owner)
+
+@router.post("/generate", response_model=StrategicPlanResponse)
+async def generate_strategic_plan(
+    force: bool = Query(default=False, description="Generate even if the recent entries are unchanged since the last plan"),
+    current_user: User = Depends(get_current_user)
+):
+    """Generate a new strategic plan based on recent journal entries and user traits.
+
+    Returns the latest plan instead when it was generated from the same entries
+    and traits, and joins any generation already running for the same input.
+    """
+    # Get recent journal entries (last 30 days)
+    entries = await _load_recent_entries(current_user)
+    fingerprint = _plan_fingerprint(current_user, entries)
     
-    return StrategicPlanResponse(
-        id=str(created_plan["_id"]),
-        title=created_plan["title"],
-        analysis=created_plan["analysis"],
-        recommendations=created_plan["recommendations"],
-        generated_at=created_plan["generated_at"],
-        zen_insight=created_plan.get("zen_insight", "")
+    if not force:
+        cached = await _cached_plan(current_user, fingerprint)
+        if cached is not None:
+            return _plan_response(cached)
+    
+    return await plan_flights.run(
+        (current_user.id, fingerprint),
+        lambda: _generate_locked(current_user, entries, fingerprint)
+    )
+
+@router.post("/generate/stream")
+async def stream_strategic_plan(
+    force: bool = Query(default=False, description="Generate even if the recent entries are unchanged since the last plan"),
+    current_user: User = Depends(get_current_user)
+):
+    """Generate a strategic plan, streaming it over Server-Sent Events.
+
+    Emits `token` events with raw model output, a `field` event as each of
+    title, analysis, recommendations and zen_insight completes, then a `done`
+    event carrying the stored plan. An unchanged input, or a generation already
+    running for this user, yields only the `done` event.
+    """
+    # Resolved before streaming starts so a missing-entries error is still a plain 400
+    entries = await _load_recent_entries(current_user)
+    fingerprint = _plan_fingerprint(current_user, entries)
+    cached = None if force else await _cached_plan(current_user, fingerprint)
+    
+    async def events():
+        if cached is not None:
+            yield _sse("done", _plan_response(cached).dict())
+            return
+        
+        owner = plan_locks.new_owner()
+        key = (current_user.id, fingerprint)
+        if plan_flights.in_flight(key) or not await plan_locks.acquire(current_user.id, owner):
+            # Wait for the running generation rather than streaming a duplicate
+            plan = await plan_flights.run(key, lambda: _generate_locked(current_user, entries, fingerprint))
+            yield _sse("done", plan.dict())
+            return
+        
+        try:
+            analysis = await _load_journal_analysis(current_user)
+            plan_data, fallback = None, False
+            async for kind, payload in generator.stream_strategic_plan(current_user, analysis):
+                if kind == "token":
+                    yield _sse("token", {"text": payload})
+                elif kind == "field":
+                    name, value = payload
+                    yield _sse("field", {"name": name, "value": value})
+                else:
+                    plan_data, fallback = payload
+            
+            plan = await _store_plan(current_user, plan_data, entries, fingerprint, fallback)
+        finally:
+            await plan_locks.release(current_user.id, owner)
+        yield _sse("done", plan.dict())
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 @router.get("/history", response_model=List[StrategicPlanResponse])
 async def get_strategic_plan_history(
     skip: int = 0,
     limit: int = 10,
+    after: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
-    """Get user's strategic plan history"""
-    db = get_database()
-    
-    cursor = db.strategic_plans.find({
-        "user_id": current_user.id
-    }).sort("generated_at", -1).skip(skip).limit(limit)
-    
-    plans = []
-    async for plan in cursor:
-        plans.append(StrategicPlanResponse(
-            id=str(plan["_id"]),
-            title=plan["title"],
-            analysis=plan["analysis"],
-            recommendations=plan["recommendations"],
-            generated_at=plan["generated_at"],
-            zen_insight=plan.get("zen_insight", "")
-        ))
+    """Get user's strategic plan history; page with the X-Next-Cursor header as `after`"""
+    docs = await plan_repository.history(current_user.id, after=after, skip=skip, limit=limit)
     
-    return plans
\ No newline at end of file
+    response = documents_response(docs, PLAN_FIELDS, PLAN_DEFAULTS)
+    set_next_cursor(response, docs, "generated_at", limit)
+    return response
\ No newline at end of file
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional
+from datetime import datetime, timedelta
 from models.user import User, BigFiveTraits
 from utils.auth import get_current_user
-from database import get_database
+from repositories import trait_history_repository
+from utils.serialization import json_response
 
 router = APIRouter()
 
@@ -10,22 +13,41 @@ async def get_user_traits(current_user: User = Depends(get_current_user)):
     """Get current user's Big Five personality traits"""
     return current_user.traits
 
+# Accepted `range` suffixes and their length in days
+RANGE_UNITS = {"d": 1, "w": 7, "m": 30, "y": 365}
+
+def _parse_range(value: str) -> Optional[datetime]:
+    """Start of a range such as 30d, 12w, 6m or 2y; None for all"""
+    if value == "all":
+        return None
+    amount, unit = value[:-1], value[-1:]
+    if amount.isdigit() and unit in RANGE_UNITS:
+        # int() rejects some str.isdigit() digits, and huge amounts overflow datetime
+        try:
+            return datetime.utcnow() - timedelta(days=int(amount) * RANGE_UNITS[unit])
+        except (OverflowError, ValueError):
+            pass
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="range must look like 30d, 12w, 6m, 2y or all"
+    )
+
 @router.get("/history")
-async def get_traits_history(current_user: User = Depends(get_current_user)):
-    """Get historical changes in user's traits over time"""
-    db = get_database()
-    
-    # Get trait history from a separate collection that tracks changes
-    cursor = db.trait_history.find(
-        {"user_id": current_user.id}
-    ).sort("updated_at", -1).limit(50)
-    
-    history = []
-    async for record in cursor:
-        history.append({
-            "traits": record["traits"],
-            "updated_at": record["updated_at"],
-            "trigger_entry_id": record.get("trigger_entry_id")
-        })
+async def get_traits_history(
+    bucket: Optional[str] = Query(default=None, pattern="^(day|week|month)$"),
+    range_: str = Query(default="all", alias="range"),
+    current_user: User = Depends(get_current_user)
+):
+    """Get historical changes in user's traits over time.
+
+    Without `bucket`, the 50 most recent updates. With `bucket=day|week|month`,
+    average traits per bucket over `range` (e.g. 90d, 12w, 2y, all), oldest first.
+    """
+    if bucket is None:
+        # Get trait history from a separate collection that tracks changes
+        history = await trait_history_repository.recent(current_user.id, limit=50)
+    else:
+        history = await trait_history_repository.buckets(current_user.id, bucket, since=_parse_range(range_))
     
-    return history
\ No newline at end of file
+    # trigger_entry_id ObjectIds are written as strings by the encoder
+    return json_response(history)
\ No newline at end of file
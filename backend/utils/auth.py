@@ -1,5 +1,11 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
+from bson import ObjectId
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -15,14 +21,133 @@ SECRET_KEY = os.getenv("JWT_SECRET", "your-secret-key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "30"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+# What get_current_user reads and caches: the User fields, without the password hash or trait bookkeeping
+AUTH_USER_PROJECTION = {"username": 1, "email": 1, "traits": 1, "created_at": 1, "updated_at": 1}
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "4"))
+# Maximum hashes waiting for a worker before new ones are rejected with 503; 0 means unbounded
+BCRYPT_MAX_QUEUE = int(os.getenv("BCRYPT_MAX_QUEUE", "0"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 security = HTTPBearer()
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+class PasswordHasher:
+    """Runs bcrypt in a dedicated, size-limited thread pool.
+
+    bcrypt holds a worker thread for hundreds of milliseconds; keeping it off
+    the event loop means a burst of logins queues here instead of stalling
+    every other request.
+    """
+
+    def __init__(self, workers: int = BCRYPT_WORKERS, max_queue: int = BCRYPT_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self.max_queue and self.queued >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many authentication requests, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            self.queued += 1
+        submitted = time.monotonic()
+
+        def task():
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.wait_seconds_total += time.monotonic() - submitted
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, task)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(pwd_context.verify, plain_password, hashed_password)
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_seconds_total": round(self.wait_seconds_total, 3)
+        }
+
+password_hasher = PasswordHasher()
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+class UserCache:
+    """Short-lived in-process cache of users for get_current_user, as read with AUTH_USER_PROJECTION.
+
+    Keyed by username, with a reverse map so writers that only know the user
+    _id can invalidate. The TTL bounds staleness across worker processes.
+    """
+
+    def __init__(self, ttl: float = AUTH_USER_CACHE_TTL, max_size: int = AUTH_USER_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._usernames_by_id: Dict[ObjectId, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username: str) -> Optional[Dict]:
+        entry = self._entries.get(username)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        if entry is not None:
+            self._drop(username)
+        self.misses += 1
+        return None
+
+    def set(self, user: Dict):
+        if self.ttl <= 0:
+            return
+        username = user["username"]
+        self._entries[username] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(username)
+        self._usernames_by_id[user["_id"]] = username
+        while len(self._entries) > self.max_size:
+            oldest, (_, oldest_user) = self._entries.popitem(last=False)
+            self._usernames_by_id.pop(oldest_user["_id"], None)
+
+    def invalidate(self, username: Optional[str] = None, user_id: Optional[ObjectId] = None):
+        if username is None and user_id is not None:
+            username = self._usernames_by_id.get(user_id)
+        if username is not None:
+            self._drop(username)
+
+    def _drop(self, username: str):
+        entry = self._entries.pop(username, None)
+        if entry is not None:
+            self._usernames_by_id.pop(entry[1]["_id"], None)
+
+    def stats(self) -> Dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+user_cache = UserCache()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -49,8 +174,18 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except JWTError:
         raise credentials_exception
     
-    db = get_database()
-    user = await db.users.find_one({"username": token_data.username})
+    user = user_cache.get(token_data.username)
     if user is None:
-        raise credentials_exception
+        db = get_database()
+        user_id = payload.get("uid")
+        if user_id and ObjectId.is_valid(user_id):
+            # Newer tokens carry the user _id, so a cache miss is a primary-key lookup
+            user = await db.users.find_one({"_id": ObjectId(user_id)}, AUTH_USER_PROJECTION)
+            if user is not None and user["username"] != token_data.username:
+                user = None
+        else:
+            user = await db.users.find_one({"username": token_data.username}, AUTH_USER_PROJECTION)
+        if user is None:
+            raise credentials_exception
+        user_cache.set(user)
     return User(**user)
\ No newline at end of file
@@ -0,0 +1,148 @@
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+import numpy as np
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Consecutive failed calls that open the circuit
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+# Seconds an open circuit rejects calls before letting a probe through; doubles per failed probe
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "15"))
+LLM_BREAKER_MAX_RESET_SECONDS = float(os.getenv("LLM_BREAKER_MAX_RESET_SECONDS", "300"))
+# Adaptive timeout: this multiple of the recent latency percentile, within [min, max]
+LLM_TIMEOUT_PERCENTILE = float(os.getenv("LLM_TIMEOUT_PERCENTILE", "95"))
+LLM_TIMEOUT_MULTIPLIER = float(os.getenv("LLM_TIMEOUT_MULTIPLIER", "2.0"))
+LLM_TIMEOUT_MIN = float(os.getenv("LLM_TIMEOUT_MIN", "3"))
+LLM_TIMEOUT_SAMPLES = int(os.getenv("LLM_TIMEOUT_SAMPLES", "200"))
+# Below this many samples an operation keeps the configured maximum timeout
+LLM_TIMEOUT_MIN_SAMPLES = int(os.getenv("LLM_TIMEOUT_MIN_SAMPLES", "20"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker with latency-based timeouts for one upstream.
+
+    After LLM_BREAKER_FAILURES consecutive failures the circuit opens and calls
+    are rejected without any I/O. Once the reset period passes a single probe
+    is let through: success closes the circuit, failure reopens it for twice
+    as long. Per-operation timeouts follow a high percentile of recent call
+    latencies, so a degraded upstream is detected in a few seconds rather than
+    after the full configured timeout.
+    """
+
+    def __init__(
+        self,
+        max_timeout: float,
+        failure_threshold: int = LLM_BREAKER_FAILURES,
+        reset_seconds: float = LLM_BREAKER_RESET_SECONDS,
+        max_reset_seconds: float = LLM_BREAKER_MAX_RESET_SECONDS,
+        percentile: float = LLM_TIMEOUT_PERCENTILE,
+        multiplier: float = LLM_TIMEOUT_MULTIPLIER,
+        min_timeout: float = LLM_TIMEOUT_MIN,
+        samples: int = LLM_TIMEOUT_SAMPLES,
+        min_samples: int = LLM_TIMEOUT_MIN_SAMPLES
+    ):
+        self.max_timeout = max_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.max_reset_seconds = max_reset_seconds
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_timeout = min(min_timeout, max_timeout)
+        self.samples = samples
+        self.min_samples = min_samples
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.current_reset = reset_seconds
+        self._probing = False
+        self._latencies: Dict[str, Deque[float]] = {}
+
+        self.opened_total = 0
+        self.rejected_total = 0
+
+    def allow(self) -> bool:
+        """Admit a call or raise CircuitOpenError; True if the call is the half-open probe"""
+        if self.state == CLOSED:
+            return False
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.current_reset:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected_total += 1
+        raise CircuitOpenError(f"Circuit {self.state}; retrying upstream in {self._retry_in():.1f}s")
+
+    def timeout(self, operation: str, probe: bool = False) -> float:
+        """Timeout for the next call of `operation`; probes get the full timeout"""
+        latencies = self._latencies.get(operation)
+        if probe or latencies is None or len(latencies) < self.min_samples:
+            return self.max_timeout
+        adaptive = float(np.percentile(latencies, self.percentile)) * self.multiplier
+        return max(self.min_timeout, min(self.max_timeout, adaptive))
+
+    def record(self, operation: str, ok: Optional[bool], seconds: Optional[float] = None, probe: bool = False):
+        """Record a call's outcome: True, False for an upstream failure, None if it was abandoned.
+
+        `seconds` feeds the operation's adaptive timeout; calls that don't use it pass None.
+        """
+        if probe:
+            self._probing = False
+        if ok is None:
+            return
+        if seconds is not None:
+            # Timed-out calls are recorded at their timeout so the percentile can climb when the upstream slows
+            self._latencies.setdefault(operation, deque(maxlen=self.samples)).append(seconds)
+
+        if self.state != CLOSED:
+            # Calls admitted before the circuit opened finish late; only the probe decides
+            if probe:
+                self._probe_result(ok)
+            return
+
+        if ok:
+            self.consecutive_failures = 0
+            return
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def _probe_result(self, ok: bool):
+        if ok:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.current_reset = self.reset_seconds
+        else:
+            self.current_reset = min(self.current_reset * 2, self.max_reset_seconds)
+            self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.opened_total += 1
+
+    def _retry_in(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.current_reset - (time.monotonic() - self.opened_at))
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "state_value": STATE_VALUES[self.state],
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in_seconds": round(self._retry_in(), 3),
+            "opened_total": self.opened_total,
+            "rejected_total": self.rejected_total,
+            "timeouts": {operation: round(self.timeout(operation), 3) for operation in self._latencies}
+        }
\ No newline at end of file
@@ -0,0 +1,148 @@
+import hashlib
+import math
+import re
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+from utils.lexicon import TOKEN_PATTERN, lexicon_index
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Token budget for the journal text placed in a trait-analysis prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "800"))
+# Share of the budget reserved for the entry being analyzed; the rest goes to context entries
+CONTEXT_PRIMARY_SHARE = float(os.getenv("CONTEXT_PRIMARY_SHARE", "0.5"))
+CONTEXT_SNIPPET_CACHE_SIZE = int(os.getenv("CONTEXT_SNIPPET_CACHE_SIZE", "2048"))
+# Context entries that would get fewer tokens than this are dropped rather than cut to a stub
+MIN_SNIPPET_TOKENS = 24
+
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+|\n+')
+PIECE_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+def estimate_tokens(text: str) -> int:
+    """Approximate BPE token count: about one token per 4 characters of a word, one per symbol"""
+    return sum(math.ceil(len(piece) / 4) for piece in PIECE_PATTERN.findall(text))
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text on a word boundary so it fits max_tokens, ellipsis included"""
+    used = 0
+    for match in PIECE_PATTERN.finditer(text):
+        used += math.ceil(len(match.group()) / 4)
+        if used > max_tokens - 1:
+            return text[:match.start()].rstrip() + "…"
+    return text
+
+class ContextBuilder:
+    """Assembles LLM prompt context within a token budget.
+
+    Text that fits is used as is. Longer text is reduced to its most
+    informative sentences (scored by lexicon keyword hits and in-text term
+    frequency) kept in their original order. Reductions are cached by
+    content hash, and duplicate entries are only included once.
+    """
+
+    def __init__(self, budget: int = CONTEXT_TOKEN_BUDGET, primary_share: float = CONTEXT_PRIMARY_SHARE, cache_size: int = CONTEXT_SNIPPET_CACHE_SIZE):
+        self.budget = budget
+        self.primary_share = primary_share
+        self.cache_size = cache_size
+        self._snippets: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+
+        self.builds = 0
+        self.summarized = 0
+        self.dropped = 0
+        self.duplicates = 0
+        self.cache_hits = 0
+
+    def _score_sentences(self, sentences: List[str]) -> List[float]:
+        tokens = [TOKEN_PATTERN.findall(sentence.lower()) for sentence in sentences]
+        frequency = Counter(token for sentence_tokens in tokens for token in sentence_tokens if len(token) > 3)
+        scores = []
+        for sentence, sentence_tokens in zip(sentences, tokens):
+            if not sentence_tokens:
+                scores.append(0.0)
+                continue
+            match = lexicon_index.scan(sentence)
+            keyword_hits = sum(abs(count) for count in match.trait_counts) + bin(match.theme_mask).count("1")
+            salience = sum(frequency[token] for token in sentence_tokens if len(token) > 3) / len(sentence_tokens)
+            scores.append(2.0 * keyword_hits + salience)
+        return scores
+
+    def summarize(self, text: str, max_tokens: int) -> str:
+        """Extractive summary of text within max_tokens"""
+        if estimate_tokens(text) <= max_tokens:
+            return text
+
+        key = (hashlib.sha1(text.encode("utf-8")).hexdigest(), max_tokens)
+        cached = self._snippets.get(key)
+        if cached is not None:
+            self._snippets.move_to_end(key)
+            self.cache_hits += 1
+            return cached
+
+        # Repeated sentences only need to appear once
+        sentences = list(dict.fromkeys(sentence.strip() for sentence in SENTENCE_PATTERN.split(text) if sentence.strip()))
+        scores = self._score_sentences(sentences)
+        chosen = set()
+        used = 0
+        for idx in sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True):
+            cost = estimate_tokens(sentences[idx]) + 1
+            if used + cost <= max_tokens:
+                chosen.add(idx)
+                used += cost
+
+        if chosen:
+            summary = " … ".join(sentences[idx] for idx in sorted(chosen))
+        else:
+            # Not even one sentence fits; fall back to the opening words
+            summary = truncate_to_tokens(text, max_tokens)
+
+        self._snippets[key] = summary
+        while len(self._snippets) > self.cache_size:
+            self._snippets.popitem(last=False)
+        self.summarized += 1
+        return summary
+
+    def build(self, primary: str, others: List[str], budget: Optional[int] = None) -> Tuple[str, List[str]]:
+        """Fit the primary text and as many of `others` (most relevant first) as the budget allows.
+
+        Returns the primary text and the context snippets, each reduced as needed.
+        """
+        budget = budget or self.budget
+        self.builds += 1
+
+        primary_text = self.summarize(primary, max(MIN_SNIPPET_TOKENS, int(budget * self.primary_share)))
+        remaining = budget - estimate_tokens(primary_text)
+
+        seen = {hashlib.sha1(primary.strip().encode("utf-8")).digest()}
+        snippets = []
+        for position, text in enumerate(others):
+            digest = hashlib.sha1(text.strip().encode("utf-8")).digest()
+            if digest in seen:
+                self.duplicates += 1
+                continue
+            seen.add(digest)
+
+            # Split what is left evenly across the entries still to place
+            share = remaining // (len(others) - position)
+            if share < MIN_SNIPPET_TOKENS:
+                self.dropped += 1
+                continue
+            snippet = self.summarize(text, share)
+            snippets.append(snippet)
+            remaining -= estimate_tokens(snippet)
+
+        return primary_text, snippets
+
+    def stats(self) -> Dict:
+        return {
+            "budget": self.budget,
+            "builds": self.builds,
+            "summarized": self.summarized,
+            "dropped": self.dropped,
+            "duplicates": self.duplicates,
+            "snippet_cache_hits": self.cache_hits,
+            "snippet_cache_size": len(self._snippets)
+        }
+
+context_builder = ContextBuilder()
\ No newline at end of file
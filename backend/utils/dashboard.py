@@ -0,0 +1,65 @@
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Tuple
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from database import get_database
+
+class DashboardSummaries:
+    """Per-user dashboard payloads materialized in dashboard_summaries.
+
+    Every write that changes what the dashboard shows calls touch(), which
+    bumps the user's version. A payload is served while its built_version
+    matches and it was built the same UTC day (its windows are date-relative).
+    The version and day make up the response ETag, so an unchanged dashboard
+    costs a single small read.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.builds = 0
+        self.not_modified = 0
+
+    @property
+    def collection(self):
+        return get_database().dashboard_summaries
+
+    async def touch(self, user_id: ObjectId):
+        """Mark the user's dashboard as changed"""
+        try:
+            await self.collection.update_one({"_id": user_id}, {"$inc": {"version": 1}}, upsert=True)
+        except Exception as e:
+            print(f"Error touching dashboard summary: {e}")
+
+    def etag(self, user_id: ObjectId, version: int) -> str:
+        return f'W/"{user_id}-{version}-{datetime.utcnow():%Y%m%d}"'
+
+    async def version(self, user_id: ObjectId) -> int:
+        doc = await self.collection.find_one({"_id": user_id}, {"version": 1})
+        return doc.get("version", 0) if doc else 0
+
+    async def get(self, user_id: ObjectId, build: Callable[[], Awaitable[Dict]]) -> Tuple[int, Dict]:
+        """Current version and payload, building and storing the payload if it is stale"""
+        doc = await self.collection.find_one({"_id": user_id})
+        version = doc.get("version", 0) if doc else 0
+        today = datetime.utcnow().date()
+        if doc is not None and doc.get("built_version") == version and "data" in doc and doc["built_at"].date() == today:
+            self.hits += 1
+            return version, doc["data"]
+
+        data = await build()
+        self.builds += 1
+        # Only stored if no write touched the user meanwhile; otherwise the next read rebuilds
+        try:
+            await self.collection.update_one(
+                {"_id": user_id, "version": version},
+                {"$set": {"data": data, "built_version": version, "built_at": datetime.utcnow()}},
+                upsert=doc is None
+            )
+        except DuplicateKeyError:
+            pass
+        return version, data
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits, "builds": self.builds, "not_modified": self.not_modified}
+
+dashboard_summaries = DashboardSummaries()
\ No newline at end of file
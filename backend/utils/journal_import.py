@@ -0,0 +1,183 @@
+import codecs
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+from bson import ObjectId
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError, PyMongoError
+from database import get_database
+from models.journal import JournalEntryImport
+from repositories import journal_repository
+from utils.json_stream import JsonRecordStreamParser
+from utils.serialization import naive_utc
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Entries validated before each insert_many and progress update
+JOURNAL_IMPORT_CHUNK_SIZE = int(os.getenv("JOURNAL_IMPORT_CHUNK_SIZE", "500"))
+JOURNAL_IMPORT_MAX_ENTRIES = int(os.getenv("JOURNAL_IMPORT_MAX_ENTRIES", "20000"))
+JOURNAL_IMPORT_MAX_RECORD_CHARS = int(os.getenv("JOURNAL_IMPORT_MAX_RECORD_CHARS", str(1024 * 1024)))
+# Rejected records listed individually in the import status; the rest are only counted
+JOURNAL_IMPORT_ERRORS_KEPT = 20
+
+IMPORT_RECEIVING = "receiving"
+IMPORT_COMPLETED = "completed"
+IMPORT_FAILED = "failed"
+
+class ImportStoreError(Exception):
+    """Raised when validated entries or import progress could not be written"""
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+class JournalImporter:
+    """Bulk journal imports from a streamed NDJSON or JSON array upload.
+
+    Records are validated as they arrive and inserted JOURNAL_IMPORT_CHUNK_SIZE
+    at a time, so memory stays bounded by one chunk whatever the upload size.
+    Progress is written to journal_imports after every chunk for clients to
+    poll while the upload is still running.
+    """
+
+    def __init__(self, chunk_size: int = JOURNAL_IMPORT_CHUNK_SIZE, max_entries: int = JOURNAL_IMPORT_MAX_ENTRIES):
+        self.chunk_size = chunk_size
+        self.max_entries = max_entries
+        self.imports = 0
+        self.entries = 0
+
+    @property
+    def collection(self):
+        return get_database().journal_imports
+
+    async def run(self, user_id: ObjectId, body: AsyncIterator[bytes]) -> Dict:
+        """Import everything in `body` and return the final import document.
+
+        A malformed or interrupted upload stops the import with status failed;
+        the valid entries received before that point are kept.
+        """
+        now = datetime.utcnow()
+        doc = {
+            "user_id": user_id,
+            "status": IMPORT_RECEIVING,
+            "format": None,
+            "received": 0,
+            "imported": 0,
+            "rejected": 0,
+            "errors": [],
+            "created_at": now,
+            "updated_at": now
+        }
+        doc["_id"] = (await self.collection.insert_one(doc)).inserted_id
+        self.imports += 1
+
+        parser = JsonRecordStreamParser(JOURNAL_IMPORT_MAX_RECORD_CHARS)
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        pending: List[Dict] = []
+
+        def accept(number: int, value):
+            doc["received"] += 1
+            if isinstance(value, Exception):
+                reason = f"invalid JSON: {value}"
+            elif not isinstance(value, dict):
+                reason = "expected a JSON object"
+            else:
+                try:
+                    entry = JournalEntryImport.parse_obj(value)
+                except ValidationError as e:
+                    reason = _validation_message(e)
+                else:
+                    fields = entry.dict()
+                    fields["created_at"] = naive_utc(fields["created_at"])
+                    fields["updated_at"] = naive_utc(fields["updated_at"])
+                    pending.append(fields)
+                    return
+            doc["rejected"] += 1
+            if len(doc["errors"]) < JOURNAL_IMPORT_ERRORS_KEPT:
+                doc["errors"].append({"record": number, "error": reason[:300]})
+
+        async def flush():
+            chunk = list(pending)
+            # Cleared up front so a chunk that failed is not inserted again by the final flush
+            pending.clear()
+            try:
+                doc["imported"] += await journal_repository.insert_many(user_id, chunk, doc["_id"])
+                await self._save(doc)
+            except BulkWriteError as e:
+                # Unordered: the rest of the chunk was inserted
+                doc["imported"] += e.details.get("nInserted", 0)
+                raise ImportStoreError(str(e)) from e
+            except PyMongoError as e:
+                raise ImportStoreError(str(e)) from e
+
+        def store_failed(error: ImportStoreError):
+            print(f"Error storing journal import: {error}")
+            doc["status"] = IMPORT_FAILED
+            doc["error"] = "Could not store the imported entries"
+
+        try:
+            async for chunk in body:
+                for number, value in parser.feed(decoder.decode(chunk)):
+                    if doc["received"] >= self.max_entries:
+                        raise ValueError(f"Imports are limited to {self.max_entries} entries")
+                    accept(number, value)
+                    if len(pending) >= self.chunk_size:
+                        await flush()
+                doc["format"] = parser.format
+            for number, value in parser.feed(decoder.decode(b"", final=True), final=True):
+                if doc["received"] >= self.max_entries:
+                    raise ValueError(f"Imports are limited to {self.max_entries} entries")
+                accept(number, value)
+            await flush()
+            doc["status"] = IMPORT_COMPLETED
+        except ImportStoreError as e:
+            store_failed(e)
+        except (ValueError, UnicodeDecodeError) as e:
+            # JSONDecodeError is a ValueError too
+            doc["status"] = IMPORT_FAILED
+            doc["error"] = str(e)[:300]
+        except Exception as e:
+            # Typically the client going away mid-upload; what arrived intact is still kept
+            print(f"Error receiving journal import: {e}")
+            doc["status"] = IMPORT_FAILED
+            doc["error"] = "Upload interrupted"
+        finally:
+            try:
+                if pending:
+                    await flush()
+            except ImportStoreError as e:
+                store_failed(e)
+            finally:
+                # Also reached on cancellation, which none of the handlers above see
+                if doc["status"] == IMPORT_RECEIVING:
+                    doc["status"] = IMPORT_FAILED
+                    doc["error"] = "Upload interrupted"
+                doc["format"] = parser.format
+                doc["finished_at"] = datetime.utcnow()
+                await self._save(doc)
+
+        self.entries += doc["imported"]
+        return doc
+
+    async def _save(self, doc: Dict):
+        doc["updated_at"] = datetime.utcnow()
+        fields = ("status", "format", "received", "imported", "rejected", "errors", "error", "updated_at", "finished_at")
+        await self.collection.update_one(
+            {"_id": doc["_id"]},
+            {"$set": {field: doc[field] for field in fields if field in doc}}
+        )
+
+    async def history(self, user_id: ObjectId, limit: int = 10) -> List[Dict]:
+        cursor = self.collection.find({"user_id": user_id}).sort("created_at", -1).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def get(self, user_id: ObjectId, import_id: ObjectId) -> Optional[Dict]:
+        return await self.collection.find_one({"_id": import_id, "user_id": user_id})
+
+    def stats(self) -> Dict:
+        return {"imports": self.imports, "entries": self.entries}
+
+journal_importer = JournalImporter()
\ No newline at end of file
@@ -0,0 +1,172 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from database import get_database
+from utils.lexicon import lexicon_index
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+JOURNAL_STATS_RETENTION_DAYS = int(os.getenv("JOURNAL_STATS_RETENTION_DAYS", "90"))
+# Words counted per entry in its day bucket, most frequent first; bounds the document size
+DAY_WORDS_PER_ENTRY = 50
+RECENT_MOOD_DAYS = 7
+# Bumped when the stored layout changes; older documents are rebuilt on read
+JOURNAL_STATS_VERSION = 2
+
+def _day_key(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d")
+
+def _words(content: str) -> Counter:
+    """Same word filter plan generation has always used for top words"""
+    return Counter(word.lower() for word in content.split() if len(word) > 3)
+
+# Words become field names, which may not contain "." or start with "$"
+def _word_field(word: str) -> str:
+    return word.replace(".", "\uff0e").replace("$", "\uff04")
+
+def _field_word(field: str) -> str:
+    return field.replace("\uff0e", ".").replace("\uff04", "$")
+
+class JournalStats:
+    """Per-user journal aggregates kept in user_journal_stats, updated as entries change.
+
+    Entry counts, mood sums, theme counts and word counts live in UTC day
+    buckets so any recent window can be summed without touching
+    journal_entries.
+    """
+
+    @property
+    def collection(self):
+        return get_database().user_journal_stats
+
+    def _entry_delta(self, entry: Dict, sign: int, inc: Dict):
+        day = f"days.{_day_key(entry['created_at'])}"
+        inc[f"{day}.entries"] = inc.get(f"{day}.entries", 0) + sign
+        if entry.get("mood_rating"):
+            inc[f"{day}.mood_sum"] = inc.get(f"{day}.mood_sum", 0) + sign * entry["mood_rating"]
+            inc[f"{day}.mood_count"] = inc.get(f"{day}.mood_count", 0) + sign
+        content = entry.get("content", "")
+        for theme in lexicon_index.extract_themes(content):
+            key = f"{day}.themes.{theme}"
+            inc[key] = inc.get(key, 0) + sign
+        for word, count in _words(content).most_common(DAY_WORDS_PER_ENTRY):
+            key = f"{day}.words.{_word_field(word)}"
+            inc[key] = inc.get(key, 0) + sign * count
+
+    async def record(self, user_id: ObjectId, before: Optional[Dict] = None, after: Optional[Dict] = None):
+        """Apply an entry change: pass `after` for a create, `before` for a delete, both for an update"""
+        inc: Dict[str, int] = {}
+        if before:
+            self._entry_delta(before, -1, inc)
+        if after:
+            self._entry_delta(after, 1, inc)
+        inc = {key: value for key, value in inc.items() if value}
+        if not inc:
+            return
+        await self.collection.update_one(
+            {"_id": user_id},
+            {"$inc": inc, "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+
+    async def rebuild(self, user_id: ObjectId) -> Dict:
+        """Recompute a user's stats from their entries within the retention period.
+
+        Not stored if an entry change or invalidation landed while the entries
+        were being read; the next read then rebuilds again.
+        """
+        db = get_database()
+        current = await self.collection.find_one({"_id": user_id}, {"updated_at": 1})
+        inc: Dict[str, int] = {}
+        since = datetime.utcnow() - timedelta(days=JOURNAL_STATS_RETENTION_DAYS)
+        cursor = db.journal_entries.find(
+            # From the start of the oldest day get() keeps
+            {"user_id": user_id, "created_at": {"$gte": since.replace(hour=0, minute=0, second=0, microsecond=0)}},
+            {"content": 1, "mood_rating": 1, "created_at": 1}
+        )
+        async for entry in cursor:
+            self._entry_delta(entry, 1, inc)
+
+        doc = {"_id": user_id, "days": {}, "complete": True, "version": JOURNAL_STATS_VERSION, "updated_at": datetime.utcnow()}
+        for path, value in inc.items():
+            _, day, *rest = path.split(".")
+            target = doc["days"].setdefault(day, {})
+            for part in rest[:-1]:
+                target = target.setdefault(part, {})
+            target[rest[-1]] = value
+
+        try:
+            if current is None:
+                await self.collection.insert_one(doc)
+            else:
+                await self.collection.replace_one({"_id": user_id, "updated_at": current.get("updated_at")}, doc)
+        except DuplicateKeyError:
+            pass
+        return doc
+
+    async def invalidate(self, user_id: ObjectId):
+        """Flag a user's stats as untrustworthy so the next read rebuilds them"""
+        try:
+            # updated_at changes too, so a rebuild already running does not store over this
+            await self.collection.update_one({"_id": user_id}, {"$set": {"complete": False, "updated_at": datetime.utcnow()}})
+        except Exception as e:
+            print(f"Error invalidating journal stats: {e}")
+
+    async def get(self, user_id: ObjectId) -> Dict:
+        """Stats, rebuilt first for users whose entries predate them or whose layout is outdated"""
+        doc = await self.collection.find_one({"_id": user_id})
+        if doc is None or not doc.get("complete") or doc.get("version") != JOURNAL_STATS_VERSION:
+            doc = await self.rebuild(user_id)
+
+        cutoff = _day_key(datetime.utcnow() - timedelta(days=JOURNAL_STATS_RETENTION_DAYS))
+        stale = [day for day in doc.get("days", {}) if day < cutoff]
+        if stale:
+            await self.collection.update_one({"_id": user_id}, {"$unset": {f"days.{day}": "" for day in stale}})
+            for day in stale:
+                del doc["days"][day]
+        return doc
+
+    def _window(self, days: Dict, since: datetime) -> Iterable[Dict]:
+        start = _day_key(since)
+        return (bucket for day, bucket in days.items() if day >= start)
+
+    def summarize(self, doc: Dict, window_days: int = 30) -> Dict:
+        """Journal analysis for the last `window_days`, in the shape plan generation expects"""
+        now = datetime.utcnow()
+        days = doc.get("days", {})
+        theme_counter = Counter()
+        word_counter = Counter()
+        entry_count = 0
+        mood_sum = mood_count = 0
+        for bucket in self._window(days, now - timedelta(days=window_days)):
+            entry_count += bucket.get("entries", 0)
+            mood_sum += bucket.get("mood_sum", 0)
+            mood_count += bucket.get("mood_count", 0)
+            theme_counter.update({theme: count for theme, count in bucket.get("themes", {}).items() if count > 0})
+            word_counter.update({_field_word(field): count for field, count in bucket.get("words", {}).items() if count > 0})
+
+        # Compare the last week's mood against the whole window
+        mood_trend = "neutral"
+        if mood_count >= 3:
+            recent = list(self._window(days, now - timedelta(days=RECENT_MOOD_DAYS)))
+            recent_count = sum(bucket.get("mood_count", 0) for bucket in recent)
+            if recent_count:
+                recent_avg = sum(bucket.get("mood_sum", 0) for bucket in recent) / recent_count
+                overall_avg = mood_sum / mood_count
+                if recent_avg > overall_avg + 0.3:
+                    mood_trend = "improving"
+                elif recent_avg < overall_avg - 0.3:
+                    mood_trend = "declining"
+
+        return {
+            "themes": [theme for theme, _ in theme_counter.most_common(5)],
+            "mood_trend": mood_trend,
+            "top_words": [word for word, _ in word_counter.most_common(10)],
+            "entry_count": entry_count
+        }
+
+journal_stats = JournalStats()
\ No newline at end of file
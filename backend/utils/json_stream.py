@@ -0,0 +1,171 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+class JsonObjectStreamParser:
+    """Incrementally parses a streamed JSON object, emitting each top-level field once its value is complete.
+
+    Text before the opening brace (such as a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        fields: List[Tuple[str, Any]] = []
+        if self.done:
+            return fields
+        self.buffer += text
+
+        while self._pos < len(self.buffer):
+            pos = self._pos
+            char = self.buffer[pos]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key_start is not None:
+                        self._key = json.loads(self.buffer[self._key_start:pos + 1])
+                        self._key_start = None
+                continue
+
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._value_start is None:
+                    self._key_start = pos
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(pos, fields)
+                    self.done = True
+                    break
+            elif self._depth == 1:
+                if char == ":":
+                    self._value_start = pos + 1
+                elif char == ",":
+                    self._emit(pos, fields)
+
+        return fields
+
+    def _emit(self, end: int, fields: List[Tuple[str, Any]]):
+        if self._key is not None and self._value_start is not None:
+            try:
+                fields.append((self._key, json.loads(self.buffer[self._value_start:end])))
+            except json.JSONDecodeError:
+                pass
+        self._key = None
+        self._value_start = None
+
+class JsonRecordStreamParser:
+    """Incrementally splits an upload into records, from NDJSON or a single JSON array.
+
+    The format is picked from the first non-blank character. feed() returns
+    (record number, value) for each complete record; an NDJSON line that does
+    not parse comes back with the JSONDecodeError as its value so the caller
+    can reject just that record. A malformed array cannot be resynchronized
+    and raises ValueError, as does a record longer than max_record_chars.
+    """
+
+    def __init__(self, max_record_chars: int):
+        self.max_record_chars = max_record_chars
+        self.buffer = ""
+        self.format: Optional[str] = None
+        self.records = 0
+        self.done = False
+        self._decoder = json.JSONDecoder()
+        self._expect_value = True
+
+    def feed(self, text: str, final: bool = False) -> List[Tuple[int, Any]]:
+        self.buffer += text
+        if self.format is None:
+            stripped = self.buffer.lstrip()
+            if not stripped:
+                if final:
+                    raise ValueError("Upload is empty")
+                return []
+            self.format = "array" if stripped[0] == "[" else "ndjson"
+            self.buffer = stripped[1:] if self.format == "array" else stripped
+
+        records = self._feed_array(final) if self.format == "array" else self._feed_lines(final)
+        if len(self.buffer) > self.max_record_chars:
+            raise ValueError(f"Record {self.records + 1} is longer than {self.max_record_chars} characters")
+        return records
+
+    def _feed_lines(self, final: bool) -> List[Tuple[int, Any]]:
+        lines = self.buffer.split("\n")
+        self.buffer = "" if final else lines.pop()
+        records = []
+        for line in lines:
+            if not line.strip():
+                continue
+            self.records += 1
+            try:
+                records.append((self.records, json.loads(line)))
+            except json.JSONDecodeError as e:
+                records.append((self.records, e))
+        if final:
+            self.done = True
+        return records
+
+    def _feed_array(self, final: bool) -> List[Tuple[int, Any]]:
+        records = []
+        buffer = self.buffer
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos == len(buffer):
+                break
+            if self.done:
+                raise ValueError("Unexpected data after the closing bracket")
+
+            char = buffer[pos]
+            if char == "]" and (not self._expect_value or not self.records):
+                self.done = True
+                pos += 1
+                continue
+            if not self._expect_value:
+                if char != ",":
+                    raise ValueError(f"Expected ',' or ']' after record {self.records}")
+                self._expect_value = True
+                pos += 1
+                continue
+
+            try:
+                value, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if final:
+                    raise ValueError(f"Record {self.records + 1} is not valid JSON: {e.msg}")
+                # Most likely cut off mid-record; the length limit catches input that never completes
+                break
+            # A bare number at the end of the buffer may still be growing
+            if end == len(buffer) and not final and not isinstance(value, (dict, list)):
+                break
+            self.records += 1
+            records.append((self.records, value))
+            self._expect_value = False
+            pos = end
+
+        self.buffer = buffer[pos:]
+        if final and not self.done:
+            raise ValueError("Upload ended before the closing bracket")
+        return records
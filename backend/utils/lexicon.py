@@ -0,0 +1,153 @@
+import re
+import numpy as np
+from scipy import sparse
+from typing import Dict, Iterable, List, Tuple
+
+TRAITS = ["openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism"]
+
+# Keywords associated with each Big Five trait
+TRAIT_KEYWORDS = {
+    "openness": {
+        "positive": ["creative", "imaginative", "curious", "artistic", "innovative", "explore", "new", "adventure", "learn", "discover"],
+        "negative": ["routine", "conventional", "traditional", "practical", "realistic", "simple", "ordinary", "familiar"]
+    },
+    "conscientiousness": {
+        "positive": ["organized", "planned", "disciplined", "goal", "achieve", "complete", "responsible", "efficient", "focused", "productive"],
+        "negative": ["disorganized", "procrastinate", "lazy", "messy", "chaotic", "unfocused", "incomplete", "rushed"]
+    },
+    "extraversion": {
+        "positive": ["social", "party", "friends", "talk", "energetic", "outgoing", "confident", "leadership", "group", "meeting"],
+        "negative": ["alone", "quiet", "solitude", "introvert", "tired", "withdrawn", "shy", "avoid", "isolation"]
+    },
+    "agreeableness": {
+        "positive": ["help", "kind", "caring", "empathy", "cooperation", "team", "support", "understanding", "compassion", "generous"],
+        "negative": ["conflict", "argue", "competitive", "selfish", "disagreement", "criticism", "harsh", "stubborn"]
+    },
+    "neuroticism": {
+        "positive": ["anxious", "stress", "worry", "nervous", "overwhelmed", "panic", "fear", "unstable", "emotional", "sensitive"],
+        "negative": ["calm", "relaxed", "stable", "confident", "peaceful", "composed", "balanced", "secure"]
+    }
+}
+
+THEME_KEYWORDS = {
+    "work_stress": ["work", "job", "boss", "deadline", "meeting", "project", "stress", "pressure"],
+    "relationships": ["friend", "family", "partner", "relationship", "love", "conflict", "social"],
+    "health_wellness": ["exercise", "health", "sleep", "tired", "energy", "wellness", "diet"],
+    "personal_growth": ["learn", "growth", "improve", "goal", "achieve", "progress", "develop"],
+    "creativity": ["create", "art", "music", "write", "design", "imagination", "creative"],
+    "anxiety_worry": ["anxious", "worry", "nervous", "fear", "panic", "stress", "overwhelmed"],
+    "happiness_joy": ["happy", "joy", "excited", "grateful", "celebration", "success", "good"],
+    "solitude_reflection": ["alone", "quiet", "reflect", "think", "meditate", "peace", "solitude"]
+}
+
+# A maximal run of word characters is always bounded by \b, so this matches r'\b\w+\b'
+TOKEN_PATTERN = re.compile(r'\w+')
+
+class LexiconMatch:
+    __slots__ = ("total_tokens", "trait_counts", "theme_mask")
+
+    def __init__(self, total_tokens: int, trait_counts: List[float], theme_mask: int):
+        self.total_tokens = total_tokens
+        self.trait_counts = trait_counts
+        self.theme_mask = theme_mask
+
+class VocabularyIndex:
+    """Precompiled lookup from tokens to trait polarity weights and theme hits.
+
+    Trait keywords match whole tokens. Theme keywords keep the substring
+    semantics of the original `keyword in content` test, which CPython runs
+    faster than any per-token dispatch in Python; keywords of a theme that
+    already matched are skipped.
+    """
+
+    def __init__(self, trait_keywords: Dict = TRAIT_KEYWORDS, theme_keywords: Dict = THEME_KEYWORDS):
+        self.traits = list(trait_keywords)
+        self.themes = list(theme_keywords)
+
+        # token -> column in the trait vocabulary
+        self.vocabulary: Dict[str, int] = {}
+        weights: List[List[float]] = []
+        for trait_idx, trait in enumerate(self.traits):
+            for polarity, sign in (("positive", 1.0), ("negative", -1.0)):
+                for word in trait_keywords[trait][polarity]:
+                    if word not in self.vocabulary:
+                        self.vocabulary[word] = len(weights)
+                        weights.append([0.0] * len(self.traits))
+                    weights[self.vocabulary[word]][trait_idx] += sign
+
+        # V x T matrix so a document vector maps to trait scores with one dot product
+        self.trait_matrix = np.array(weights, dtype=np.float64)
+        self._trait_lookup: Dict[str, Tuple[Tuple[int, float], ...]] = {
+            word: tuple((idx, w) for idx, w in enumerate(weights[col]) if w)
+            for word, col in self.vocabulary.items()
+        }
+
+        self._theme_keywords: List[Tuple[int, Tuple[str, ...]]] = [
+            (1 << theme_idx, tuple(theme_keywords[theme]))
+            for theme_idx, theme in enumerate(self.themes)
+        ]
+
+    def tokenize(self, text: str) -> List[str]:
+        return TOKEN_PATTERN.findall(text.lower())
+
+    def _theme_mask(self, text_lower: str) -> int:
+        mask = 0
+        for bit, keywords in self._theme_keywords:
+            for keyword in keywords:
+                if keyword in text_lower:
+                    mask |= bit
+                    break
+        return mask
+
+    def scan(self, text: str, themes: bool = True) -> LexiconMatch:
+        """Single pass over the tokens collecting net trait counts, plus theme hits"""
+        text_lower = text.lower()
+        tokens = TOKEN_PATTERN.findall(text_lower)
+        trait_counts = [0.0] * len(self.traits)
+        trait_lookup = self._trait_lookup
+
+        for token in tokens:
+            weights = trait_lookup.get(token)
+            if weights:
+                for idx, weight in weights:
+                    trait_counts[idx] += weight
+
+        theme_mask = self._theme_mask(text_lower) if themes else 0
+        return LexiconMatch(len(tokens), trait_counts, theme_mask)
+
+    def themes_from_mask(self, mask: int) -> List[str]:
+        return [theme for idx, theme in enumerate(self.themes) if mask & (1 << idx)]
+
+    def extract_themes(self, text: str) -> List[str]:
+        return self.themes_from_mask(self._theme_mask(text.lower()))
+
+    def vectorize(self, text: str) -> sparse.csr_matrix:
+        """Sparse 1 x V term-count vector over the trait vocabulary"""
+        matrix, _ = self.doc_term_matrix([text])
+        return matrix
+
+    def doc_term_matrix(self, texts: Iterable[str]) -> Tuple[sparse.csr_matrix, np.ndarray]:
+        """Sparse N x V term-count matrix over the trait vocabulary, plus each text's token total"""
+        vocabulary = self.vocabulary
+        indices: List[int] = []
+        indptr = [0]
+        totals: List[int] = []
+
+        for text in texts:
+            tokens = TOKEN_PATTERN.findall(text.lower())
+            totals.append(len(tokens))
+            indices.extend(vocabulary[token] for token in tokens if token in vocabulary)
+            indptr.append(len(indices))
+
+        matrix = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float64), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+            shape=(len(totals), len(vocabulary))
+        )
+        matrix.sum_duplicates()
+        return matrix, np.array(totals, dtype=np.float64)
+
+    def trait_scores(self, vectors: sparse.spmatrix) -> np.ndarray:
+        """Net positive-minus-negative keyword counts per trait for each row"""
+        return np.asarray(vectors @ self.trait_matrix)
+
+lexicon_index = VocabularyIndex()
@@ -0,0 +1,127 @@
+import copy
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+from database import get_database
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+LLM_CACHE_MONGO = os.getenv("LLM_CACHE_MONGO", "false").lower() in ("1", "true", "yes")
+# Blended USD price per 1k tokens, used only to estimate what cache hits save
+LLM_COST_PER_1K_TOKENS = float(os.getenv("LLM_COST_PER_1K_TOKENS", "0.0006"))
+
+def cache_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\x00{prompt}".encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """Content-addressed cache of parsed LLM responses.
+
+    Entries are keyed by a hash of (model, prompt). Lookups hit an in-process
+    LRU first and, when enabled, a Mongo collection with a TTL index shared by
+    all workers.
+    """
+
+    def __init__(self, max_size: int = LLM_CACHE_SIZE, ttl_seconds: int = LLM_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.use_mongo = False
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+
+        self.memory_hits = 0
+        self.mongo_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.saved_tokens = 0
+
+    async def enable_mongo(self):
+        db = get_database()
+        await db.llm_cache.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+        self.use_mongo = True
+
+    async def get(self, model: str, prompt: str) -> Optional[Any]:
+        key = cache_key(model, prompt)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry["expires_at"] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                self._record_saving(entry)
+                return copy.deepcopy(entry["value"])
+            del self._entries[key]
+
+        if self.use_mongo:
+            try:
+                doc = await get_database().llm_cache.find_one({"_id": key})
+            except Exception:
+                doc = None
+            if doc is not None:
+                # Mongo's TTL monitor only runs once a minute, so check age here too
+                age = (datetime.utcnow() - doc["created_at"]).total_seconds()
+                if age < self.ttl_seconds:
+                    self._remember(key, doc["value"], doc.get("latency", 0.0), doc.get("tokens", 0), self.ttl_seconds - age)
+                    self.mongo_hits += 1
+                    self._record_saving(doc)
+                    return copy.deepcopy(doc["value"])
+
+        self.misses += 1
+        return None
+
+    async def set(self, model: str, prompt: str, value: Any, latency: float = 0.0, tokens: int = 0):
+        key = cache_key(model, prompt)
+        self._remember(key, value, latency, tokens, self.ttl_seconds)
+
+        if self.use_mongo:
+            try:
+                await get_database().llm_cache.replace_one(
+                    {"_id": key},
+                    {
+                        "model": model,
+                        "value": value,
+                        "latency": latency,
+                        "tokens": tokens,
+                        "created_at": datetime.utcnow()
+                    },
+                    upsert=True
+                )
+            except Exception as e:
+                print(f"Error writing LLM cache entry: {e}")
+
+    def _remember(self, key: str, value: Any, latency: float, tokens: int, ttl: float):
+        self._entries[key] = {
+            "value": copy.deepcopy(value),
+            "latency": latency,
+            "tokens": tokens,
+            "expires_at": time.monotonic() + ttl
+        }
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _record_saving(self, entry: Dict):
+        self.saved_seconds += entry.get("latency", 0.0)
+        self.saved_tokens += entry.get("tokens", 0)
+
+    def stats(self) -> Dict:
+        hits = self.memory_hits + self.mongo_hits
+        lookups = hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "mongo_enabled": self.use_mongo,
+            "memory_hits": self.memory_hits,
+            "mongo_hits": self.mongo_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "saved_tokens": self.saved_tokens,
+            "saved_cost_usd": round(self.saved_tokens / 1000 * LLM_COST_PER_1K_TOKENS, 6)
+        }
+
+llm_cache = LLMResponseCache()
@@ -0,0 +1,237 @@
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Dict, List, Optional
+import httpx
+from utils.metrics import record_llm_call
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+LLM_MODEL = os.getenv("LLM_MODEL", "openai/gpt-4o-mini")
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "true").lower() in ("1", "true", "yes")
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class LLMStreamError(Exception):
+    """Raised when a streamed completion cannot be started"""
+
+def _upstream_ok(status_code: int) -> bool:
+    """Whether a response says the upstream is healthy; client errors are our own problem"""
+    return status_code < 500 and status_code != 429
+
+class LLMClient:
+    """Shared OpenRouter client with a pooled keep-alive connection set.
+
+    A single httpx.AsyncClient is reused across requests so TCP/TLS handshakes
+    are paid once per connection, and a semaphore caps the number of LLM calls
+    in flight across the whole process. Calls go through a circuit breaker:
+    while OpenRouter is failing they raise CircuitOpenError immediately so
+    callers can use their local fallback.
+    """
+
+    def __init__(
+        self,
+        base_url: str = OPENROUTER_BASE_URL,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        max_keepalive_connections: int = LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = LLM_KEEPALIVE_EXPIRY,
+        connect_timeout: float = LLM_CONNECT_TIMEOUT,
+        timeout: float = LLM_TIMEOUT,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        http2: bool = LLM_HTTP2
+    ):
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.connect_timeout = connect_timeout
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.breaker = CircuitBreaker(max_timeout=timeout)
+        self.max_concurrency = max_concurrency
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        self.requests_total = 0
+        self.errors_total = 0
+        self.in_flight = 0
+        self.waiting = 0
+
+    async def start(self):
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=self.http2,
+            limits=self.limits,
+            timeout=self.timeout,
+            headers={
+                "HTTP-Referer": "http://localhost:8000",
+                "X-Title": "KiraAI"
+            }
+        )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def chat_completion(
+        self,
+        messages: List[Dict],
+        model: str = LLM_MODEL,
+        timeout: Optional[float] = None,
+        operation: str = "default"
+    ) -> httpx.Response:
+        """POST a chat completion request, waiting for a concurrency slot first.
+
+        Raises CircuitOpenError without sending anything while the circuit is open.
+        Without an explicit timeout, the operation's adaptive timeout applies.
+        """
+        if self._client is None:
+            # Scripts that never ran the app lifespan still get a working client
+            await self.start()
+
+        probe = self.breaker.allow()
+        ok = None
+        call_timeout = timeout if timeout is not None else self.breaker.timeout(operation, probe)
+        seconds = None
+        try:
+            self.waiting += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+
+            self.in_flight += 1
+            self.requests_total += 1
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                response = await self._client.post(
+                    "/chat/completions",
+                    headers={"Authorization": f"Bearer {os.getenv('OPENROUTER_API_KEY')}"},
+                    json={"model": model, "messages": messages},
+                    timeout=httpx.Timeout(call_timeout, connect=min(self.connect_timeout, call_timeout))
+                )
+                outcome = "ok" if response.status_code == 200 else "http_error"
+                ok = _upstream_ok(response.status_code)
+                return response
+            except Exception:
+                self.errors_total += 1
+                ok = False
+                raise
+            finally:
+                self.in_flight -= 1
+                self._semaphore.release()
+                seconds = time.perf_counter() - started
+                record_llm_call(operation, outcome, seconds)
+        finally:
+            self.breaker.record(operation, ok, seconds, probe)
+
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict],
+        model: str = LLM_MODEL,
+        timeout: Optional[float] = None,
+        operation: str = "default"
+    ) -> AsyncIterator[str]:
+        """Stream a chat completion (`stream: true`), yielding content deltas as they arrive.
+
+        Goes through the circuit breaker like chat_completion, but keeps the
+        configured timeout: a stream's duration says little about upstream health.
+        """
+        if self._client is None:
+            await self.start()
+
+        probe = self.breaker.allow()
+        ok = None
+        try:
+            self.waiting += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+
+            self.in_flight += 1
+            self.requests_total += 1
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                async with self._client.stream(
+                    "POST",
+                    "/chat/completions",
+                    headers={"Authorization": f"Bearer {os.getenv('OPENROUTER_API_KEY')}"},
+                    json={"model": model, "messages": messages, "stream": True},
+                    timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+                ) as response:
+                    if response.status_code != 200:
+                        outcome = "http_error"
+                        ok = _upstream_ok(response.status_code)
+                        raise LLMStreamError(f"OpenRouter returned {response.status_code}")
+
+                    async for line in response.aiter_lines():
+                        # Skip blank separators and ": keep-alive" comment lines
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                        if delta:
+                            yield delta
+                    outcome = "ok"
+                    ok = True
+            except Exception:
+                self.errors_total += 1
+                if ok is None:
+                    ok = False
+                raise
+            finally:
+                self.in_flight -= 1
+                self._semaphore.release()
+                record_llm_call(operation, outcome, time.perf_counter() - started)
+        finally:
+            self.breaker.record(operation, ok, probe=probe)
+
+    def stats(self) -> Dict:
+        connections = 0
+        idle_connections = 0
+        if self._client is not None:
+            # httpx does not expose pool state publicly; read it from the transport if present
+            pool = getattr(self._client._transport, "_pool", None)
+            for connection in getattr(pool, "connections", []):
+                connections += 1
+                if connection.is_idle():
+                    idle_connections += 1
+
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_concurrency": self.max_concurrency,
+            "connections": connections,
+            "idle_connections": idle_connections,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+            "circuit": self.breaker.stats()
+        }
+
+llm_client = LLMClient()
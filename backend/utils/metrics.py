@@ -0,0 +1,231 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from pymongo import monitoring
+from starlette.routing import Match
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+TOKEN_BUCKETS = (100, 250, 500, 750, 1000, 1500, 2000, 3000, 4000, 8000)
+
+LabelValues = Tuple[str, ...]
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+class Counter:
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> (per-bucket counts with a trailing +Inf slot, sum, count)
+        self._series: Dict[LabelValues, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, ('le', le))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, label_values)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, label_values)} {count}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def counter(self, name: str, description: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, description, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, description: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, description, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, gauges: Optional[Dict[str, Dict]] = None) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        # Point-in-time stats of the app's subsystems, flattened into gauges
+        for prefix, stats in (gauges or {}).items():
+            for key, value in _flatten(stats):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"kiraai_{prefix}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+def _flatten(stats: Dict, prefix: str = "") -> List[Tuple[str, object]]:
+    items = []
+    for key, value in stats.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            items.extend(_flatten(value, f"{name}_"))
+        else:
+            items.append((name, value))
+    return items
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Request latency by route", ("method", "route"))
+http_requests = registry.counter(
+    "http_requests_total", "Requests by route and status", ("method", "route", "status"))
+http_request_db_seconds = registry.histogram(
+    "http_request_db_seconds", "Time spent in MongoDB commands per request", ("method", "route"))
+http_request_db_calls = registry.histogram(
+    "http_request_db_calls", "MongoDB commands issued per request", ("method", "route"), COUNT_BUCKETS)
+http_request_llm_seconds = registry.histogram(
+    "http_request_llm_seconds", "Time spent waiting on OpenRouter per request", ("method", "route"))
+mongo_command_duration = registry.histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ("command",))
+llm_request_duration = registry.histogram(
+    "llm_request_duration_seconds", "OpenRouter call latency", ("operation", "outcome"))
+llm_fallbacks = registry.counter(
+    "llm_fallbacks_total", "Calls answered by the local fallback instead of the LLM", ("operation", "reason"))
+llm_prompt_tokens = registry.histogram(
+    "llm_prompt_tokens", "Locally estimated prompt size per LLM call", ("operation",), TOKEN_BUCKETS)
+llm_tokens = registry.counter(
+    "llm_tokens_total", "Tokens billed by OpenRouter", ("operation", "kind"))
+
+class RequestStats:
+    __slots__ = ("db_calls", "db_seconds", "llm_calls", "llm_seconds")
+
+    def __init__(self):
+        self.db_calls = 0
+        self.db_seconds = 0.0
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+
+# Set by the middleware for the duration of a request. Motor runs commands on
+# executor threads with a copy of the caller's context, so the command
+# listener still sees the request's stats object.
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+class MongoCommandListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        seconds = event.duration_micros / 1_000_000
+        mongo_command_duration.observe(seconds, event.command_name)
+        stats = current_request.get()
+        if stats is not None:
+            stats.db_calls += 1
+            stats.db_seconds += seconds
+
+def record_llm_call(operation: str, outcome: str, seconds: float):
+    llm_request_duration.observe(seconds, operation, outcome)
+    stats = current_request.get()
+    if stats is not None:
+        stats.llm_calls += 1
+        stats.llm_seconds += seconds
+
+def record_llm_fallback(operation: str, reason: str):
+    llm_fallbacks.inc(operation, reason)
+
+def record_llm_tokens(operation: str, estimated_prompt_tokens: int, usage: Optional[Dict] = None):
+    """Record the estimated prompt size and, when the response carries it, the billed usage"""
+    llm_prompt_tokens.observe(estimated_prompt_tokens, operation)
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage and usage.get(kind):
+            llm_tokens.inc(operation, kind.split("_")[0], amount=usage[kind])
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, DB and LLM time per route template.
+
+    Timing covers the whole response body, so streamed responses are
+    measured to their last chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            method = scope["method"]
+            route = _route_template(scope)
+            http_request_duration.observe(elapsed, method, route)
+            http_requests.inc(method, route, str(status_code))
+            http_request_db_seconds.observe(stats.db_seconds, method, route)
+            http_request_db_calls.observe(stats.db_calls, method, route)
+            http_request_llm_seconds.observe(stats.llm_seconds, method, route)
+
+def _route_template(scope) -> str:
+    # Label by route template, not raw path, to keep the label set bounded
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope["path"])
+    return "unmatched"
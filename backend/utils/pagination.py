@@ -0,0 +1,43 @@
+import base64
+import json
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(sort_value: datetime, doc_id: ObjectId) -> str:
+    """Opaque cursor pointing just past (sort_value, doc_id) in descending order"""
+    payload = json.dumps({"t": sort_value.isoformat(), "id": str(doc_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), ObjectId(payload["id"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+def keyset_filter(sort_field: str, cursor: Optional[str]) -> Dict:
+    """Filter selecting documents after the cursor for a (sort_field desc, _id desc) sort"""
+    if not cursor:
+        return {}
+    sort_value, doc_id = decode_cursor(cursor)
+    return {
+        "$or": [
+            {sort_field: {"$lt": sort_value}},
+            {sort_field: sort_value, "_id": {"$lt": doc_id}}
+        ]
+    }
+
+def set_next_cursor(response: Response, docs: list, sort_field: str, limit: int):
+    """Expose the cursor for the following page, if the page was full"""
+    if limit > 0 and len(docs) == limit:
+        last = docs[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last[sort_field], last["_id"])
@@ -0,0 +1,245 @@
+import asyncio
+import math
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+from database import get_database
+from repositories import journal_repository
+from utils.lexicon import TOKEN_PATTERN
+from utils.serialization import naive_utc
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "auto" uses the Mongo text index and switches to the local index if $text is unsupported
+JOURNAL_SEARCH_BACKEND = os.getenv("JOURNAL_SEARCH_BACKEND", "auto").lower()
+
+SEARCH_INDEX_USERS = int(os.getenv("SEARCH_INDEX_USERS", "256"))
+# Other workers' writes are only seen after a rebuild, so per-user indexes expire
+SEARCH_INDEX_TTL_SECONDS = float(os.getenv("SEARCH_INDEX_TTL_SECONDS", "300"))
+# OperationFailure code for a $text query on a collection without a text index
+INDEX_NOT_FOUND = 27
+TITLE_WEIGHT = 3
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SEARCH_PROJECTION = {
+    "title": 1,
+    "content": 1,
+    "mood_rating": 1,
+    "tags": 1,
+    "created_at": 1,
+    "updated_at": 1
+}
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+class UserSearchIndex:
+    """Inverted index over one user's entries: term -> {entry_id: weighted term frequency}"""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[ObjectId, int]] = {}
+        self.entries: Dict[ObjectId, Dict] = {}
+        self.lengths: Dict[ObjectId, int] = {}
+        self.total_length = 0
+        self.built_at = time.monotonic()
+
+    def add(self, entry: Dict):
+        entry_id = entry["_id"]
+        if entry_id in self.entries:
+            self.remove(entry_id)
+        terms = Counter(tokenize(entry.get("content", "")))
+        for term in tokenize(entry.get("title", "")):
+            terms[term] += TITLE_WEIGHT
+        for term, count in terms.items():
+            self.postings.setdefault(term, {})[entry_id] = count
+        self.entries[entry_id] = entry
+        self.lengths[entry_id] = sum(terms.values())
+        self.total_length += self.lengths[entry_id]
+
+    def remove(self, entry_id: ObjectId):
+        entry = self.entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for term in set(tokenize(entry.get("content", "")) + tokenize(entry.get("title", ""))):
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(entry_id, None)
+                if not docs:
+                    del self.postings[term]
+        self.total_length -= self.lengths.pop(entry_id)
+
+    def search(
+        self,
+        query: Optional[str],
+        tags: List[str],
+        start: Optional[datetime],
+        end: Optional[datetime]
+    ) -> List[Tuple[Dict, float]]:
+        """BM25-ranked matches for any query term, filtered by tags (all required) and date range"""
+        def matches(entry: Dict) -> bool:
+            if tags and not set(tags).issubset(entry.get("tags", [])):
+                return False
+            if start and entry["created_at"] < start:
+                return False
+            if end and entry["created_at"] > end:
+                return False
+            return True
+
+        terms = set(tokenize(query)) if query else set()
+        if not terms:
+            results = [(entry, 0.0) for entry in self.entries.values() if matches(entry)]
+            results.sort(key=lambda item: item[0]["created_at"], reverse=True)
+            return results
+
+        count = len(self.entries)
+        avg_length = self.total_length / count if count else 0.0
+        scores: Dict[ObjectId, float] = {}
+        for term in terms:
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for entry_id, tf in docs.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[entry_id] / avg_length) if avg_length else BM25_K1
+                scores[entry_id] = scores.get(entry_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        results = [
+            (self.entries[entry_id], score)
+            for entry_id, score in scores.items()
+            if matches(self.entries[entry_id])
+        ]
+        results.sort(key=lambda item: (item[1], item[0]["created_at"]), reverse=True)
+        return results
+
+class LocalSearchIndex:
+    """In-process per-user inverted indexes, for deployments whose Mongo lacks $text.
+
+    A user's index is built from their entries on first search and kept
+    current by the journal router's writes; the least recently searched
+    users are evicted beyond SEARCH_INDEX_USERS.
+    """
+
+    def __init__(self, max_users: int = SEARCH_INDEX_USERS, ttl_seconds: float = SEARCH_INDEX_TTL_SECONDS):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._indexes: "OrderedDict[ObjectId, UserSearchIndex]" = OrderedDict()
+        self._building: Dict[ObjectId, asyncio.Future] = {}
+        self.builds = 0
+
+    async def _build(self, user_id: ObjectId) -> UserSearchIndex:
+        db = get_database()
+        index = UserSearchIndex()
+        async for entry in db.journal_entries.find({"user_id": user_id}, SEARCH_PROJECTION):
+            index.add(entry)
+        self.builds += 1
+        return index
+
+    async def get(self, user_id: ObjectId) -> UserSearchIndex:
+        index = self._indexes.get(user_id)
+        if index is not None and time.monotonic() - index.built_at < self.ttl_seconds:
+            self._indexes.move_to_end(user_id)
+            return index
+
+        # Concurrent searches for the same user share one build
+        pending = self._building.get(user_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._build(user_id))
+            self._building[user_id] = pending
+            try:
+                index = await pending
+            finally:
+                del self._building[user_id]
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+            return index
+        return await pending
+
+    def add(self, user_id: ObjectId, entry: Dict):
+        """Reflect a created or updated entry in the user's index, if it is loaded"""
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.add({key: entry[key] for key in ("_id", *SEARCH_PROJECTION) if key in entry})
+
+    def remove(self, user_id: ObjectId, entry_id: ObjectId):
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.remove(entry_id)
+
+    def invalidate(self, user_id: ObjectId):
+        """Drop a user's index after a bulk change; the next search rebuilds it"""
+        self._indexes.pop(user_id, None)
+
+    def stats(self) -> Dict:
+        return {
+            "users": len(self._indexes),
+            "entries": sum(len(index.entries) for index in self._indexes.values()),
+            "terms": sum(len(index.postings) for index in self._indexes.values()),
+            "builds": self.builds
+        }
+
+local_search_index = LocalSearchIndex()
+
+class JournalSearch:
+    """Entry search through the Mongo text index, falling back to local_search_index"""
+
+    def __init__(self, backend: str = JOURNAL_SEARCH_BACKEND, local: LocalSearchIndex = local_search_index):
+        self.backend = backend
+        self.local = local
+        self.mongo_searches = 0
+        self.local_searches = 0
+
+    async def search(
+        self,
+        user_id: ObjectId,
+        query: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        skip: int = 0,
+        limit: int = 20
+    ) -> List[Tuple[Dict, float]]:
+        """(entry, score) pairs, best match first; newest first when there is no query"""
+        tags = tags or []
+        # Stored dates are naive UTC; an offset in the query string makes these aware
+        start, end = naive_utc(start), naive_utc(end)
+        if self.backend != "local":
+            try:
+                results = await journal_repository.search(user_id, query, tags, start, end, skip, limit)
+                self.mongo_searches += 1
+                return results
+            except OperationFailure as e:
+                # Only a missing text index means $text is unusable here; anything else is passed on
+                if self.backend == "mongo" or e.code != INDEX_NOT_FOUND:
+                    raise
+                self._use_local(e)
+            # NotImplementedError covers in-memory Mongo substitutes used in development
+            except NotImplementedError as e:
+                if self.backend == "mongo":
+                    raise
+                self._use_local(e)
+
+        index = await self.local.get(user_id)
+        self.local_searches += 1
+        return index.search(query, tags, start, end)[skip:skip + limit]
+
+    def _use_local(self, error: Exception):
+        print(f"Mongo text search unavailable, using local search index: {error}")
+        self.backend = "local"
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.backend,
+            "mongo_searches": self.mongo_searches,
+            "local_searches": self.local_searches,
+            **{f"local_{key}": value for key, value in self.local.stats().items()}
+        }
+
+journal_search = JournalSearch()
\ No newline at end of file
@@ -0,0 +1,41 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+import orjson
+from bson import ObjectId
+from fastapi import Response
+
+def _default(value: Any):
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def naive_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """Timezone-aware datetimes as naive UTC, the form stored and compared throughout"""
+    if moment is not None and moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def document_fields(doc: Dict, fields: Tuple[str, ...], defaults: Optional[Dict] = None) -> Dict:
+    """The response fields of a document, with _id renamed to a string id and missing values defaulted"""
+    defaults = defaults or {}
+    item = {"id": str(doc["_id"])}
+    for field in fields:
+        value = doc.get(field)
+        item[field] = defaults.get(field) if value is None else value
+    return item
+
+def serialize_documents(docs: Iterable[Dict], fields: Tuple[str, ...], defaults: Optional[Dict] = None) -> bytes:
+    """Encode Mongo documents straight to a JSON array, renaming _id to a string id.
+
+    Meant for list endpoints whose documents already have the response model's
+    shape, so the per-item model construction and response validation can be
+    skipped. orjson writes naive datetimes in the same ISO form FastAPI does.
+    """
+    return orjson.dumps([document_fields(doc, fields, defaults) for doc in docs], default=_default)
+
+def json_response(content: Any) -> Response:
+    """Response encoded by orjson alone, bypassing FastAPI's jsonable_encoder pass"""
+    return Response(content=orjson.dumps(content, default=_default), media_type="application/json")
+
+def documents_response(docs: Iterable[Dict], fields: Tuple[str, ...], defaults: Optional[Dict] = None) -> Response:
+    return Response(content=serialize_documents(docs, fields, defaults), media_type="application/json")
\ No newline at end of file
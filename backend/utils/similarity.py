@@ -0,0 +1,221 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+from bson import ObjectId
+from database import get_database
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SIMILARITY_INDEX_USERS = int(os.getenv("SIMILARITY_INDEX_USERS", "256"))
+SIMILARITY_INDEX_TTL_SECONDS = float(os.getenv("SIMILARITY_INDEX_TTL_SECONDS", "300"))
+# Only the newest entries are vectorized for users with very long histories
+SIMILARITY_MAX_ENTRIES = int(os.getenv("SIMILARITY_MAX_ENTRIES", "2000"))
+
+# Hashing keeps vectorization stateless, so entries can be added without refitting a vocabulary
+vectorizer = HashingVectorizer(
+    n_features=2 ** 18,
+    alternate_sign=False,
+    norm=None,
+    stop_words="english"
+)
+
+def _entry_text(entry: Dict) -> str:
+    return f"{entry.get('title', '')} {entry.get('content', '')}"
+
+class Weights(NamedTuple):
+    """TF-IDF rows for one version of a user's term frequencies, with the entry id of each row"""
+    tf: sparse.csr_matrix
+    entry_ids: List[ObjectId]
+    tfidf: sparse.csr_matrix
+    idf: np.ndarray
+
+def _weigh(tf: sparse.csr_matrix, entry_ids: List[ObjectId]) -> Weights:
+    # Smoothed idf as in sklearn's TfidfTransformer; df comes straight from the stored rows
+    df = np.bincount(tf.indices, minlength=tf.shape[1])
+    idf = np.log((1 + len(entry_ids)) / (1 + df)) + 1.0
+    return Weights(tf, entry_ids, normalize(tf.multiply(idf).tocsr()), idf)
+
+class UserVectors:
+    """One user's term-frequency rows, with the TF-IDF matrix derived lazily after writes.
+
+    Writes replace tf and entry_ids rather than changing them in place, so a
+    pair read together stays consistent while weights are computed from it
+    on another thread.
+    """
+
+    def __init__(self, entry_ids: List[ObjectId], tf: sparse.csr_matrix):
+        self.entry_ids = entry_ids
+        self.positions = {entry_id: row for row, entry_id in enumerate(entry_ids)}
+        self.tf = tf
+        self.built_at = time.monotonic()
+        self.weights: Optional[Weights] = None
+
+    def add(self, entry_id: ObjectId, row: sparse.csr_matrix):
+        if entry_id in self.positions:
+            tf = self.tf.tolil()
+            tf[self.positions[entry_id]] = row
+            self.tf = tf.tocsr()
+        else:
+            self.positions[entry_id] = len(self.entry_ids)
+            self.entry_ids = [*self.entry_ids, entry_id]
+            self.tf = sparse.vstack([self.tf, row], format="csr")
+
+    def remove(self, entry_id: ObjectId):
+        row = self.positions.pop(entry_id, None)
+        if row is None:
+            return
+        keep = np.ones(len(self.entry_ids), dtype=bool)
+        keep[row] = False
+        self.tf = self.tf[keep]
+        self.entry_ids = self.entry_ids[:row] + self.entry_ids[row + 1:]
+        self.positions = {entry_id: row for row, entry_id in enumerate(self.entry_ids)}
+
+    def stale(self) -> bool:
+        return self.weights is None or self.weights.tf is not self.tf
+
+def neighbours(weights: Weights, query: sparse.csr_matrix, k: int, exclude: Optional[ObjectId] = None) -> List[Tuple[ObjectId, float]]:
+    """Top-k entries by cosine similarity to a term-frequency row"""
+    if not weights.entry_ids:
+        return []
+    scores = (weights.tfidf @ normalize(query.multiply(weights.idf).tocsr()).T).toarray().ravel()
+    if exclude is not None and exclude in weights.entry_ids:
+        scores[weights.entry_ids.index(exclude)] = -1.0
+
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [(weights.entry_ids[row], float(scores[row])) for row in top if scores[row] > 0]
+
+class SimilarityIndex:
+    """Per-user TF-IDF matrices for finding related entries, cached in-process.
+
+    Built from a user's entries on first use and kept current by the journal
+    router's writes; least recently used users are evicted beyond
+    SIMILARITY_INDEX_USERS and any user's matrix is rebuilt after the TTL so
+    writes handled by other workers are picked up.
+    """
+
+    def __init__(self, max_users: int = SIMILARITY_INDEX_USERS, ttl_seconds: float = SIMILARITY_INDEX_TTL_SECONDS):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._users: "OrderedDict[ObjectId, UserVectors]" = OrderedDict()
+        self._building: Dict[ObjectId, asyncio.Future] = {}
+        # Writes made while a user's matrix is being built, applied once it is; None if invalidated meanwhile
+        self._missed: Dict[ObjectId, Optional[List[Callable[[UserVectors], None]]]] = {}
+        self.builds = 0
+        self.weighings = 0
+
+    def vectorize(self, texts: List[str]) -> sparse.csr_matrix:
+        if not texts:
+            return sparse.csr_matrix((0, vectorizer.n_features))
+        return vectorizer.transform(texts).tocsr()
+
+    async def _build(self, user_id: ObjectId) -> UserVectors:
+        db = get_database()
+        cursor = db.journal_entries.find(
+            {"user_id": user_id},
+            {"title": 1, "content": 1}
+        ).sort("created_at", -1).limit(SIMILARITY_MAX_ENTRIES)
+        entries = await cursor.to_list(length=SIMILARITY_MAX_ENTRIES)
+        self.builds += 1
+        # Vectorizing and weighting thousands of entries is CPU-bound; keep it off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, self._vectors, entries)
+
+    def _vectors(self, entries: List[Dict]) -> UserVectors:
+        vectors = UserVectors(
+            [entry["_id"] for entry in entries],
+            self.vectorize([_entry_text(entry) for entry in entries])
+        )
+        vectors.weights = _weigh(vectors.tf, vectors.entry_ids)
+        return vectors
+
+    async def _load(self, user_id: ObjectId) -> UserVectors:
+        try:
+            vectors = await self._build(user_id)
+        finally:
+            del self._building[user_id]
+            missed = self._missed.pop(user_id)
+        if missed is None:
+            # Invalidated while building: good enough for this lookup, but not kept
+            return vectors
+        for change in missed:
+            change(vectors)
+        self._users[user_id] = vectors
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+        return vectors
+
+    async def _weights(self, vectors: UserVectors) -> Weights:
+        """Current TF-IDF weights, recomputed off the event loop after writes"""
+        if not vectors.stale():
+            return vectors.weights
+        tf, entry_ids = vectors.tf, vectors.entry_ids
+        weights = await asyncio.get_running_loop().run_in_executor(None, _weigh, tf, entry_ids)
+        self.weighings += 1
+        # A write landing meanwhile replaced tf; these weights still answer this lookup
+        if vectors.tf is tf:
+            vectors.weights = weights
+        return weights
+
+    async def get(self, user_id: ObjectId) -> UserVectors:
+        vectors = self._users.get(user_id)
+        if vectors is not None and time.monotonic() - vectors.built_at < self.ttl_seconds:
+            self._users.move_to_end(user_id)
+            return vectors
+
+        # Concurrent requests for the same user share one build
+        pending = self._building.get(user_id)
+        if pending is None:
+            self._missed[user_id] = []
+            pending = self._building[user_id] = asyncio.ensure_future(self._load(user_id))
+        return await pending
+
+    def _apply(self, user_id: ObjectId, change: Callable[[UserVectors], None]):
+        vectors = self._users.get(user_id)
+        if vectors is not None:
+            change(vectors)
+        # The build may have read the entries before this write
+        missed = self._missed.get(user_id)
+        if missed is not None:
+            missed.append(change)
+
+    def add(self, user_id: ObjectId, entry: Dict):
+        """Reflect a created or updated entry in the user's matrix, if it is loaded or being built"""
+        if user_id in self._users or user_id in self._missed:
+            row = self.vectorize([_entry_text(entry)])
+            self._apply(user_id, lambda vectors: vectors.add(entry["_id"], row))
+
+    def remove(self, user_id: ObjectId, entry_id: ObjectId):
+        self._apply(user_id, lambda vectors: vectors.remove(entry_id))
+
+    def invalidate(self, user_id: ObjectId):
+        """Drop a user's matrix after a bulk change; the next lookup rebuilds it"""
+        self._users.pop(user_id, None)
+        if user_id in self._missed:
+            self._missed[user_id] = None
+
+    async def related(self, user_id: ObjectId, entry: Dict, k: int = 5) -> List[Tuple[ObjectId, float]]:
+        """Entries most similar to a stored entry, excluding the entry itself"""
+        weights = await self._weights(await self.get(user_id))
+        return neighbours(weights, self.vectorize([_entry_text(entry)]), k, exclude=entry["_id"])
+
+    async def similar_to_text(self, user_id: ObjectId, text: str, k: int = 5, exclude: Optional[ObjectId] = None) -> List[Tuple[ObjectId, float]]:
+        weights = await self._weights(await self.get(user_id))
+        return neighbours(weights, self.vectorize([text]), k, exclude=exclude)
+
+    def stats(self) -> Dict:
+        return {
+            "users": len(self._users),
+            "entries": sum(len(vectors.entry_ids) for vectors in self._users.values()),
+            "builds": self.builds,
+            "weighings": self.weighings
+        }
+
+similarity_index = SimilarityIndex()
\ No newline at end of file
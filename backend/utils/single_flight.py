@@ -0,0 +1,91 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from pymongo.errors import DuplicateKeyError
+from database import get_database
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one in-process execution.
+
+    The first caller starts the work as a task; callers arriving while it runs
+    await the same task. The task is shielded, so a caller disconnecting does
+    not cancel the work for everyone else.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self.started = 0
+        self.joined = 0
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        pending = self._flights.get(key)
+        if pending is not None:
+            self.joined += 1
+            return await asyncio.shield(pending)
+
+        pending = asyncio.ensure_future(fn())
+        self._flights[key] = pending
+        pending.add_done_callback(lambda _: self._flights.pop(key, None))
+        self.started += 1
+        return await asyncio.shield(pending)
+
+    def stats(self) -> Dict:
+        return {"in_flight": len(self._flights), "started": self.started, "joined": self.joined}
+
+class LeaseLock:
+    """Mutual exclusion across workers, held as a leased document per key.
+
+    A lock whose holder died is taken over once its lease expires, the same
+    way trait jobs are reclaimed; the TTL index on lease_until only tidies up.
+    """
+
+    def __init__(self, collection: str, lease_seconds: float, poll_seconds: float = 0.5):
+        self.collection_name = collection
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.acquired = 0
+        self.contended = 0
+
+    @property
+    def collection(self):
+        return get_database()[self.collection_name]
+
+    def new_owner(self) -> str:
+        return uuid.uuid4().hex
+
+    async def acquire(self, key: Any, owner: str) -> bool:
+        now = datetime.utcnow()
+        lease = {"owner": owner, "lease_until": now + timedelta(seconds=self.lease_seconds)}
+        try:
+            await self.collection.insert_one({"_id": key, **lease})
+        except DuplicateKeyError:
+            taken = await self.collection.find_one_and_update(
+                {"_id": key, "lease_until": {"$lte": now}},
+                {"$set": lease}
+            )
+            if taken is None:
+                self.contended += 1
+                return False
+        self.acquired += 1
+        return True
+
+    async def release(self, key: Any, owner: str):
+        try:
+            await self.collection.delete_one({"_id": key, "owner": owner})
+        except Exception as e:
+            print(f"Error releasing {self.collection_name} lock: {e}")
+
+    async def wait(self, key: Any):
+        """Return once the lock is free or its lease has run out"""
+        while True:
+            lock = await self.collection.find_one({"_id": key}, {"lease_until": 1})
+            if lock is None or lock["lease_until"] <= datetime.utcnow():
+                return
+            await asyncio.sleep(self.poll_seconds)
+
+    def stats(self) -> Dict:
+        return {"acquired": self.acquired, "contended": self.contended}
\ No newline at end of file
@@ -0,0 +1,179 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from database import get_database
+from utils.traits import update_traits_from_entry, update_traits_from_import
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TRAIT_WORKERS = int(os.getenv("TRAIT_WORKERS", "2"))
+TRAIT_JOB_MAX_ATTEMPTS = int(os.getenv("TRAIT_JOB_MAX_ATTEMPTS", "5"))
+TRAIT_JOB_LEASE_SECONDS = int(os.getenv("TRAIT_JOB_LEASE_SECONDS", "120"))
+TRAIT_JOB_POLL_SECONDS = float(os.getenv("TRAIT_JOB_POLL_SECONDS", "5"))
+TRAIT_JOB_BACKOFF_SECONDS = float(os.getenv("TRAIT_JOB_BACKOFF_SECONDS", "5"))
+
+JOB_PENDING = "pending"
+JOB_PROCESSING = "processing"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# Jobs are for a single entry, or for all entries of a bulk import
+JOB_ENTRY = "entry"
+JOB_IMPORT = "import"
+
+class TraitJobQueue:
+    """Durable queue of trait updates stored in the trait_jobs collection.
+
+    Jobs are keyed on the journal entry _id, so enqueueing the same entry twice
+    is a no-op. Workers claim jobs with a lease; a job whose worker died is
+    picked up again once the lease expires.
+    """
+
+    def __init__(self, workers: int = TRAIT_WORKERS):
+        self.workers = workers
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+
+    async def start(self):
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        print(f"Started {self.workers} trait workers")
+
+    async def stop(self, timeout: float = 10.0):
+        self._stopping = True
+        if self._wakeup:
+            self._wakeup.set()
+        if not self._tasks:
+            return
+        # Let in-flight jobs finish; anything cut off is re-claimed after its lease expires
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        self._tasks = []
+
+    async def enqueue(self, entry_id: ObjectId, user_id: ObjectId, kind: str = JOB_ENTRY):
+        """Schedule a trait update for an entry, or for an import by its id (idempotent per id)"""
+        db = get_database()
+        now = datetime.utcnow()
+        await db.trait_jobs.update_one(
+            {"_id": entry_id},
+            {
+                "$setOnInsert": {
+                    "user_id": user_id,
+                    "kind": kind,
+                    "status": JOB_PENDING,
+                    "attempts": 0,
+                    "last_error": None,
+                    "created_at": now,
+                    "updated_at": now,
+                    "next_run_at": now
+                }
+            },
+            upsert=True
+        )
+        if self._wakeup:
+            self._wakeup.set()
+
+    def stats(self) -> Dict:
+        return {
+            "workers": len(self._tasks),
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed
+        }
+
+    async def get_status(self, entry_id: ObjectId) -> Optional[Dict]:
+        db = get_database()
+        return await db.trait_jobs.find_one({"_id": entry_id})
+
+    async def _claim(self) -> Optional[Dict]:
+        db = get_database()
+        now = datetime.utcnow()
+        return await db.trait_jobs.find_one_and_update(
+            {
+                "$or": [
+                    {"status": JOB_PENDING, "next_run_at": {"$lte": now}},
+                    {"status": JOB_PROCESSING, "lease_until": {"$lte": now}}
+                ]
+            },
+            {
+                "$set": {
+                    "status": JOB_PROCESSING,
+                    "lease_until": now + timedelta(seconds=TRAIT_JOB_LEASE_SECONDS),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("next_run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _worker(self):
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                job = await self._claim()
+            except Exception as e:
+                print(f"Error claiming trait job: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), TRAIT_JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._run(job)
+            except Exception as e:
+                print(f"Error recording trait job {job['_id']}: {e}")
+
+    async def _run(self, job: Dict):
+        db = get_database()
+        try:
+            if job.get("kind") == JOB_IMPORT:
+                await update_traits_from_import(job["user_id"], job["_id"])
+            else:
+                entry = await db.journal_entries.find_one(
+                    {"_id": job["_id"]},
+                    {"user_id": 1, "content": 1}
+                )
+                # A deleted entry has nothing left to analyze
+                if entry:
+                    await update_traits_from_entry(entry["user_id"], entry["content"], entry_id=entry["_id"])
+
+            await db.trait_jobs.update_one(
+                {"_id": job["_id"]},
+                {
+                    "$set": {"status": JOB_DONE, "updated_at": datetime.utcnow(), "last_error": None},
+                    "$unset": {"lease_until": ""}
+                }
+            )
+            self.completed += 1
+        except Exception as e:
+            now = datetime.utcnow()
+            if job["attempts"] >= TRAIT_JOB_MAX_ATTEMPTS:
+                update = {"status": JOB_FAILED}
+                self.failed += 1
+            else:
+                # Exponential backoff between retries
+                delay = TRAIT_JOB_BACKOFF_SECONDS * (2 ** (job["attempts"] - 1))
+                update = {"status": JOB_PENDING, "next_run_at": now + timedelta(seconds=delay)}
+                self.retried += 1
+            update.update({"updated_at": now, "last_error": str(e)[:500]})
+            await db.trait_jobs.update_one(
+                {"_id": job["_id"]},
+                {"$set": update, "$unset": {"lease_until": ""}}
+            )
+
+trait_queue = TraitJobQueue()
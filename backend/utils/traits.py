@@ -1,73 +1,70 @@
-import re
+import asyncio
+import math
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from collections import Counter, defaultdict
 import heapq
+import time
 from datetime import datetime, timedelta
 from database import get_database
 from bson import ObjectId
-import httpx
+from pymongo.errors import DuplicateKeyError
+from utils.llm_client import llm_client, LLM_MODEL
+from utils.circuit_breaker import CircuitOpenError
+from utils.llm_cache import llm_cache
+from utils.lexicon import TRAITS, TRAIT_KEYWORDS, lexicon_index
+from utils.auth import user_cache
+from utils.dashboard import dashboard_summaries
+from utils.metrics import record_llm_fallback, record_llm_tokens
+from utils.context_builder import context_builder, estimate_tokens
+from utils.similarity import similarity_index
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Weight applied to each entry's adjustments before they are added to the traits
+TRAIT_SMOOTHING = float(os.getenv("TRAIT_SMOOTHING", "0.3"))
+DEFAULT_TRAITS = {trait: 5.0 for trait in TRAITS}
+# Other entries sent along with the triggering one as context for the trait analysis
+TRAIT_CONTEXT_ENTRIES = 4
+
 class TraitAnalyzer:
     def __init__(self):
         # Keywords associated with each Big Five trait
-        self.trait_keywords = {
-            "openness": {
-                "positive": ["creative", "imaginative", "curious", "artistic", "innovative", "explore", "new", "adventure", "learn", "discover"],
-                "negative": ["routine", "conventional", "traditional", "practical", "realistic", "simple", "ordinary", "familiar"]
-            },
-            "conscientiousness": {
-                "positive": ["organized", "planned", "disciplined", "goal", "achieve", "complete", "responsible", "efficient", "focused", "productive"],
-                "negative": ["disorganized", "procrastinate", "lazy", "messy", "chaotic", "unfocused", "incomplete", "rushed"]
-            },
-            "extraversion": {
-                "positive": ["social", "party", "friends", "talk", "energetic", "outgoing", "confident", "leadership", "group", "meeting"],
-                "negative": ["alone", "quiet", "solitude", "introvert", "tired", "withdrawn", "shy", "avoid", "isolation"]
-            },
-            "agreeableness": {
-                "positive": ["help", "kind", "caring", "empathy", "cooperation", "team", "support", "understanding", "compassion", "generous"],
-                "negative": ["conflict", "argue", "competitive", "selfish", "disagreement", "criticism", "harsh", "stubborn"]
-            },
-            "neuroticism": {
-                "positive": ["anxious", "stress", "worry", "nervous", "overwhelmed", "panic", "fear", "unstable", "emotional", "sensitive"],
-                "negative": ["calm", "relaxed", "stable", "confident", "peaceful", "composed", "balanced", "secure"]
-            }
-        }
+        self.trait_keywords = TRAIT_KEYWORDS
+        self.index = lexicon_index
     
     def analyze_text_sentiment(self, text: str) -> Dict[str, float]:
         """Analyze text and return trait adjustments using keyword frequency analysis"""
-        text_lower = text.lower()
-        words = re.findall(r'\b\w+\b', text_lower)
-        word_count = Counter(words)
+        match = self.index.scan(text, themes=False)
+        total_words = match.total_tokens
         
         trait_scores = {}
         
-        for trait, keywords in self.trait_keywords.items():
-            positive_score = sum(word_count[word] for word in keywords["positive"] if word in word_count)
-            negative_score = sum(word_count[word] for word in keywords["negative"] if word in word_count)
-            
-            # Calculate net sentiment for this trait
-            net_score = positive_score - negative_score
-            total_words = len(words)
-            
+        for trait, net_score in zip(self.index.traits, match.trait_counts):
             # Normalize by text length and apply scaling
             if total_words > 0:
                 normalized_score = (net_score / total_words) * 10
                 # Apply sigmoid-like function to bound changes
-                trait_scores[trait] = np.tanh(normalized_score) * 0.5  # Max change of 0.5 per entry
+                trait_scores[trait] = math.tanh(normalized_score) * 0.5  # Max change of 0.5 per entry
             else:
                 trait_scores[trait] = 0.0
         
         return trait_scores
     
+    def analyze_batch(self, texts: List[str]) -> np.ndarray:
+        """Trait adjustments for many texts at once as an (N x 5) array, columns in TRAITS order"""
+        matrix, totals = self.index.doc_term_matrix(texts)
+        net_scores = self.index.trait_scores(matrix)
+        
+        # Same scaling as analyze_text_sentiment, applied to the whole matrix; empty texts stay at 0
+        totals = totals[:, np.newaxis]
+        normalized = np.divide(net_scores, totals, out=np.zeros_like(net_scores), where=totals > 0) * 10
+        return np.tanh(normalized) * 0.5
+    
     async def get_ai_personality_analysis(self, text: str, current_traits: Dict[str, float]) -> Dict[str, float]:
         """Use OpenAI API via OpenRouter for advanced personality analysis"""
-        api_key = os.getenv("OPENROUTER_API_KEY")
-        
         prompt = f"""
         Analyze the following journal entry and determine how it might affect the writer's Big Five personality traits.
         
@@ -84,45 +81,99 @@ class TraitAnalyzer:
         {{"openness": 0.0, "conscientiousness": 0.0, "extraversion": 0.0, "agreeableness": 0.0, "neuroticism": 0.0}}
         """
         
+        cached = await llm_cache.get(LLM_MODEL, prompt)
+        if cached is not None:
+            return cached
+        
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "HTTP-Referer": "http://localhost:8000",
-                        "X-Title": "KiraAI"
-                    },
-                    json={
-                        "model": "openai/gpt-4o-mini",
-                        "messages": [{"role": "user", "content": prompt}]
-                    }
-                )
+            started = time.perf_counter()
+            response = await llm_client.chat_completion(
+                [{"role": "user", "content": prompt}],
+                operation="traits"
+            )
+            
+            if response.status_code == 200:
+                result = response.json()
+                record_llm_tokens("traits", estimate_tokens(prompt), result.get("usage"))
+                content = result["choices"][0]["message"]["content"]
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    content = result["choices"][0]["message"]["content"]
-                    
-                    # Extract JSON from response
-                    import json
-                    try:
-                        adjustments = json.loads(content)
-                        # Ensure all traits are present and bounded
-                        bounded_adjustments = {}
-                        for trait in ["openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism"]:
-                            value = adjustments.get(trait, 0.0)
-                            bounded_adjustments[trait] = max(-0.3, min(0.3, value))
-                        return bounded_adjustments
-                    except json.JSONDecodeError:
-                        # Fallback to keyword analysis if JSON parsing fails
-                        return self.analyze_text_sentiment(text)
-                else:
+                # Extract JSON from response
+                import json
+                try:
+                    adjustments = json.loads(content)
+                    # Ensure all traits are present and bounded
+                    bounded_adjustments = {}
+                    for trait in ["openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism"]:
+                        value = adjustments.get(trait, 0.0)
+                        bounded_adjustments[trait] = max(-0.3, min(0.3, value))
+                    await llm_cache.set(
+                        LLM_MODEL, prompt, bounded_adjustments,
+                        latency=time.perf_counter() - started,
+                        tokens=result.get("usage", {}).get("total_tokens", 0)
+                    )
+                    return bounded_adjustments
+                except json.JSONDecodeError:
+                    # Fallback to keyword analysis if JSON parsing fails
+                    record_llm_fallback("traits", "invalid_json")
                     return self.analyze_text_sentiment(text)
+            else:
+                record_llm_tokens("traits", estimate_tokens(prompt))
+                record_llm_fallback("traits", "http_error")
+                return self.analyze_text_sentiment(text)
+        except CircuitOpenError:
+            # OpenRouter is failing; skip straight to keyword analysis
+            record_llm_fallback("traits", "circuit_open")
+            return self.analyze_text_sentiment(text)
         except Exception:
             # Fallback to keyword analysis if API fails
+            record_llm_fallback("traits", "request_error")
             return self.analyze_text_sentiment(text)
 
-async def update_traits_from_entry(user_id: ObjectId, entry_content: str):
+def apply_trait_adjustments(
+    current_traits: Dict[str, float],
+    adjustments: Dict[str, float],
+    smoothing: float = TRAIT_SMOOTHING
+) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """Return (new_traits, final_adjustments) after smoothing and clamping to 0-10"""
+    # Apply exponential moving average for temporal smoothing
+    final_adjustments = {}
+    for trait in current_traits.keys():
+        adjustment = adjustments.get(trait, 0.0)
+        # Exponential moving average smoothing to reduce volatility
+        final_adjustments[trait] = adjustment * smoothing
+    
+    # Update traits with bounds checking
+    new_traits = {}
+    for trait, current_value in current_traits.items():
+        adjustment = final_adjustments.get(trait, 0.0)
+        new_value = current_value + adjustment
+        
+        # Ensure traits stay within 0-10 bounds
+        new_traits[trait] = max(0.0, min(10.0, new_value))
+    
+    return new_traits, final_adjustments
+
+class TraitUpdateConflict(Exception):
+    """Raised when the user's traits changed while an update was being computed"""
+
+async def _write_pending_history(db, user_id: ObjectId, record: Dict):
+    """Insert the trait_history record staged on the user by their last update, then clear it.
+
+    The record is staged in the same write as the traits and carries its own
+    _id, so a job that failed after the users write finishes the history on
+    retry without ever inserting it twice.
+    """
+    try:
+        await db.trait_history.insert_one(dict(record))
+    except DuplicateKeyError:
+        pass
+    await db.users.update_one(
+        {"_id": user_id, "pending_trait_history._id": record["_id"]},
+        {"$unset": {"pending_trait_history": ""}}
+    )
+    await dashboard_summaries.touch(user_id)
+
+async def update_traits_from_entry(user_id: ObjectId, entry_content: str, entry_id: Optional[ObjectId] = None):
     """Update user traits based on new journal entry using adaptive algorithm"""
     db = get_database()
     analyzer = TraitAnalyzer()
@@ -132,65 +183,162 @@ async def update_traits_from_entry(user_id: ObjectId, entry_content: str):
     if not user:
         return
     
-    current_traits = user.get("traits", {
-        "openness": 5.0,
-        "conscientiousness": 5.0,
-        "extraversion": 5.0,
-        "agreeableness": 5.0,
-        "neuroticism": 5.0
-    })
+    if user.get("pending_trait_history"):
+        await _write_pending_history(db, user_id, user["pending_trait_history"])
+    
+    # Each entry is applied at most once, even if its job is retried
+    if entry_id is not None and entry_id in user.get("trait_entry_ids", []):
+        return
+    
+    current_traits = user.get("traits", dict(DEFAULT_TRAITS))
     
     # Get recent entries for context (last 5 entries)
     recent_entries = []
-    cursor = db.journal_entries.find(
-        {"user_id": user_id}
-    ).sort("created_at", -1).limit(5)
+    if entry_id is not None:
+        recent_entries.append(entry_content)
+        # Prefer the entries most similar to this one, topped up with the most recent others
+        similar = await similarity_index.similar_to_text(user_id, entry_content, k=TRAIT_CONTEXT_ENTRIES, exclude=entry_id)
+        context_ids = [similar_id for similar_id, _ in similar]
+        if context_ids:
+            similar_docs = await db.journal_entries.find(
+                {"_id": {"$in": context_ids}},
+                {"content": 1}
+            ).to_list(length=len(context_ids))
+            by_id = {doc["_id"]: doc["content"] for doc in similar_docs}
+            recent_entries.extend(by_id[similar_id] for similar_id in context_ids if similar_id in by_id)
+        
+        # The triggering entry may no longer be the newest one, so exclude it explicitly
+        remaining = TRAIT_CONTEXT_ENTRIES + 1 - len(recent_entries)
+        cursor = None
+        if remaining > 0:
+            cursor = db.journal_entries.find(
+                {"user_id": user_id, "_id": {"$nin": [entry_id, *context_ids]}},
+                {"content": 1}
+            ).sort("created_at", -1).limit(remaining)
+    else:
+        cursor = db.journal_entries.find(
+            {"user_id": user_id},
+            {"content": 1}
+        ).sort("created_at", -1).limit(5)
     
-    async for entry in cursor:
-        recent_entries.append(entry["content"])
+    if cursor is not None:
+        async for entry in cursor:
+            recent_entries.append(entry["content"])
     
-    # Combine current entry with recent context
-    context_text = entry_content
-    if len(recent_entries) > 1:
-        # Add recent entries for context (current entry + 4 previous)
-        context_text += " Previous entries: " + " ".join(recent_entries[1:5])
+    # Combine current entry with related and recent context, reduced to fit the token budget
+    context_text, snippets = context_builder.build(entry_content, recent_entries[1:TRAIT_CONTEXT_ENTRIES + 1])
+    if snippets:
+        context_text += " Previous entries: " + " ".join(snippets)
     
     # Get AI personality analysis with exponential moving average smoothing
     ai_adjustments = await analyzer.get_ai_personality_analysis(context_text, current_traits)
     
-    # Apply exponential moving average for temporal smoothing (alpha = 0.3)
-    final_adjustments = {}
-    for trait in current_traits.keys():
-        adjustment = ai_adjustments.get(trait, 0.0)
-        # Exponential moving average smoothing to reduce volatility
-        final_adjustments[trait] = adjustment * 0.3
+    new_traits, final_adjustments = apply_trait_adjustments(current_traits, ai_adjustments)
     
-    # Update traits with bounds checking
-    new_traits = {}
-    for trait, current_value in current_traits.items():
-        adjustment = final_adjustments.get(trait, 0.0)
-        new_value = current_value + adjustment
-        
-        # Ensure traits stay within 0-10 bounds
-        new_traits[trait] = max(0.0, min(10.0, new_value))
+    # Trait history for tracking changes over time, staged with the traits and written below
+    history = {
+        "_id": ObjectId(),
+        "user_id": user_id,
+        "traits": new_traits,
+        "previous_traits": current_traits,
+        "adjustments": final_adjustments,
+        "updated_at": datetime.utcnow(),
+        "trigger_entry_id": entry_id,
+        "trigger_entry_content": entry_content[:200]  # Store snippet for context
+    }
     
-    # Update user in database
-    await db.users.update_one(
-        {"_id": user_id},
-        {
-            "$set": {
-                "traits": new_traits,
-                "updated_at": datetime.utcnow()
-            }
+    # Update user in database, guarded against a concurrent update of the same user
+    user_update = {
+        "$set": {
+            "traits": new_traits,
+            "updated_at": datetime.utcnow(),
+            "pending_trait_history": history
         }
+    }
+    if entry_id is not None:
+        user_update["$push"] = {"trait_entry_ids": {"$each": [entry_id], "$slice": -50}}
+    
+    result = await db.users.update_one(
+        {"_id": user_id, "updated_at": user.get("updated_at")},
+        user_update
     )
+    if result.modified_count == 0:
+        raise TraitUpdateConflict(f"Traits for user {user_id} changed during update")
+    user_cache.invalidate(user_id=user_id)
+    await _write_pending_history(db, user_id, history)
+
+# Imported entries scored per analyze_batch call
+IMPORT_TRAIT_CHUNK_SIZE = 500
+
+async def update_traits_from_import(user_id: ObjectId, import_id: ObjectId):
+    """Apply all entries of a bulk import to the user's traits in one job.
+
+    Entries are scored with the keyword analyzer in batches and folded into
+    the traits oldest first with the usual smoothing, as replay_traits.py
+    does, instead of one LLM call per entry. One trait_history record covers
+    the whole import.
+    """
+    db = get_database()
+    analyzer = TraitAnalyzer()
+    
+    user = await db.users.find_one({"_id": user_id})
+    if not user:
+        return
+    
+    if user.get("pending_trait_history"):
+        await _write_pending_history(db, user_id, user["pending_trait_history"])
+    
+    # Applied at most once, even if the job is retried
+    if import_id in user.get("trait_entry_ids", []):
+        return
+    
+    current_traits = user.get("traits", dict(DEFAULT_TRAITS))
+    new_traits = dict(current_traits)
+    applied = 0
+    
+    def fold(contents: List[str]):
+        nonlocal new_traits, applied
+        for row in analyzer.analyze_batch(contents):
+            new_traits, _ = apply_trait_adjustments(new_traits, dict(zip(TRAITS, row.tolist())))
+        applied += len(contents)
     
-    # Store trait history for tracking changes over time
-    await db.trait_history.insert_one({
+    # Scoring is CPU-bound; chunks are folded one at a time off the event loop
+    loop = asyncio.get_running_loop()
+    chunk: List[str] = []
+    cursor = db.journal_entries.find(
+        {"user_id": user_id, "import_id": import_id},
+        {"content": 1}
+    ).sort([("created_at", 1), ("_id", 1)]).batch_size(IMPORT_TRAIT_CHUNK_SIZE)
+    async for entry in cursor:
+        chunk.append(entry["content"])
+        if len(chunk) >= IMPORT_TRAIT_CHUNK_SIZE:
+            await loop.run_in_executor(None, fold, chunk)
+            chunk = []
+    if chunk:
+        await loop.run_in_executor(None, fold, chunk)
+    if not applied:
+        return
+    
+    history = {
+        "_id": ObjectId(),
         "user_id": user_id,
         "traits": new_traits,
         "previous_traits": current_traits,
-        "adjustments": final_adjustments,
+        "adjustments": {trait: new_traits[trait] - current_traits.get(trait, 5.0) for trait in new_traits},
         "updated_at": datetime.utcnow(),
-        "trigger_entry_content": entry_content[:200]  # Store snippet for context
-    })
\ No newline at end of file
+        "trigger_entry_id": None,
+        "trigger_import_id": import_id,
+        "import_entries": applied,
+        "source": "import"
+    }
+    result = await db.users.update_one(
+        {"_id": user_id, "updated_at": user.get("updated_at")},
+        {
+            "$set": {"traits": new_traits, "updated_at": datetime.utcnow(), "pending_trait_history": history},
+            "$push": {"trait_entry_ids": {"$each": [import_id], "$slice": -50}}
+        }
+    )
+    if result.modified_count == 0:
+        raise TraitUpdateConflict(f"Traits for user {user_id} changed during update")
+    user_cache.invalidate(user_id=user_id)
+    await _write_pending_history(db, user_id, history)
\ No newline at end of file
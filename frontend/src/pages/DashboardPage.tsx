@@ -24,12 +24,12 @@ import {
 import { useNavigate } from 'react-router-dom';
 import { format } from 'date-fns';
 import { useAuth } from '../contexts/AuthContext';
-import { JournalEntry, BigFiveTraits } from '../types';
-import { journalAPI, traitsAPI } from '../services/api';
+import { JournalEntrySummary, BigFiveTraits } from '../types';
+import { dashboardAPI } from '../services/api';
 import LoadingSpinner from '../components/LoadingSpinner';
 
 const DashboardPage: React.FC = () => {
-  const [recentEntries, setRecentEntries] = useState<JournalEntry[]>([]);
+  const [recentEntries, setRecentEntries] = useState<JournalEntrySummary[]>([]);
   const [traits, setTraits] = useState<BigFiveTraits | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
@@ -44,12 +44,9 @@ const DashboardPage: React.FC = () => {
   const loadDashboardData = async () => {
     try {
       setLoading(true);
-      const [entriesData, traitsData] = await Promise.all([
-        journalAPI.getEntries(0, 5),
-        traitsAPI.getTraits(),
-      ]);
-      setRecentEntries(entriesData);
-      setTraits(traitsData);
+      const dashboard = await dashboardAPI.getDashboard();
+      setRecentEntries(dashboard.recent_entries);
+      setTraits(dashboard.traits);
     } catch (err: any) {
       setError('Failed to load dashboard data');
     } finally {
@@ -307,7 +304,7 @@ const DashboardPage: React.FC = () => {
                               display: 'block',
                             }}
                           >
-                            {entry.content.slice(0, 60)}...
+                            {entry.preview.slice(0, 60)}...
                           </Typography>
                           <Box sx={{ display: 'flex', gap: 1, mt: 0.5, alignItems: 'center' }}>
                             <Typography variant="caption" color="text.secondary">
@@ -43,6 +43,7 @@ const JournalPage: React.FC = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [searchTerm, setSearchTerm] = useState('');
+  const [searchResults, setSearchResults] = useState<JournalEntry[] | null>(null);
   const [dialogOpen, setDialogOpen] = useState(false);
   const [editingEntry, setEditingEntry] = useState<JournalEntry | null>(null);
   const [menuAnchor, setMenuAnchor] = useState<{ element: HTMLElement; entryId: string } | null>(null);
@@ -59,6 +60,23 @@ const JournalPage: React.FC = () => {
     loadEntries();
   }, []);
 
+  // Search runs on the server so it covers every entry, not just the loaded page
+  useEffect(() => {
+    const query = searchTerm.trim();
+    if (!query) {
+      setSearchResults(null);
+      return;
+    }
+    const timer = setTimeout(async () => {
+      try {
+        setSearchResults(await journalAPI.searchEntries(query));
+      } catch (err: any) {
+        setError('Failed to search journal entries');
+      }
+    }, 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm, entries]);
+
   const loadEntries = async () => {
     try {
       setLoading(true);
@@ -172,11 +190,7 @@ const JournalPage: React.FC = () => {
     setMenuAnchor(null);
   };
 
-  const filteredEntries = entries.filter(entry =>
-    entry.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    entry.content.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    entry.tags.some(tag => tag.toLowerCase().includes(searchTerm.toLowerCase()))
-  );
+  const filteredEntries = searchResults ?? entries;
 
   const getMoodColor = (rating?: number) => {
     if (!rating) return '#6B7280';
@@ -65,13 +65,26 @@ const StrategicPlanPage: React.FC = () => {
   };
 
   const generateNewPlan = async () => {
+    const previousPlan = currentPlan;
     try {
       setGenerating(true);
       setError('');
-      const newPlan = await strategicPlanAPI.generatePlan();
+      // Show the plan as it streams in, then replace it with the stored version
+      setCurrentPlan({
+        id: '',
+        title: '',
+        analysis: '',
+        recommendations: [],
+        generated_at: new Date().toISOString(),
+        zen_insight: '',
+      });
+      const newPlan = await strategicPlanAPI.generatePlanStream((name, value) => {
+        setCurrentPlan((plan) => (plan ? { ...plan, [name]: value } : plan));
+      });
       setCurrentPlan(newPlan);
       setPlanHistory([newPlan, ...planHistory]);
     } catch (err: any) {
+      setCurrentPlan(previousPlan);
       setError(err.response?.data?.detail || 'Failed to generate strategic plan. Make sure you have recent journal entries.');
     } finally {
       setGenerating(false);
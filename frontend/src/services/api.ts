@@ -3,11 +3,14 @@ import {
   User, 
   UserCreate, 
   JournalEntry, 
+  JournalEntrySummary,
   JournalEntryCreate, 
   JournalEntryUpdate,
   StrategicPlan,
   AuthToken,
-  BigFiveTraits
+  BigFiveTraits,
+  Dashboard,
+  JournalImportStatus
 } from '../types';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000/api';
@@ -56,11 +59,36 @@ export const journalAPI = {
     return response.data;
   },
 
+  // Title, mood, tags and a short preview only; much smaller than full entries
+  getEntrySummaries: async (skip = 0, limit = 20): Promise<JournalEntrySummary[]> => {
+    const response = await api.get(`/journal/?skip=${skip}&limit=${limit}&view=summary`);
+    return response.data;
+  },
+
+  searchEntries: async (
+    query: string,
+    options: { tags?: string[]; start?: string; end?: string; limit?: number } = {}
+  ): Promise<JournalEntry[]> => {
+    const params = new URLSearchParams();
+    if (query) params.append('q', query);
+    (options.tags || []).forEach(tag => params.append('tags', tag));
+    if (options.start) params.append('start', options.start);
+    if (options.end) params.append('end', options.end);
+    params.append('limit', String(options.limit || 50));
+    const response = await api.get(`/journal/search?${params.toString()}`);
+    return response.data;
+  },
+
   getEntry: async (id: string): Promise<JournalEntry> => {
     const response = await api.get(`/journal/${id}`);
     return response.data;
   },
 
+  getRelatedEntries: async (id: string, k = 5): Promise<JournalEntry[]> => {
+    const response = await api.get(`/journal/${id}/related?k=${k}`);
+    return response.data;
+  },
+
   createEntry: async (entry: JournalEntryCreate): Promise<JournalEntry> => {
     const response = await api.post('/journal/', entry);
     return response.data;
@@ -74,6 +102,22 @@ export const journalAPI = {
   deleteEntry: async (id: string): Promise<void> => {
     await api.delete(`/journal/${id}`);
   },
+
+  // Body is an .ndjson or .json export; onProgress reports the share uploaded (0-1)
+  importEntries: async (file: Blob, onProgress?: (fraction: number) => void): Promise<JournalImportStatus> => {
+    const response = await api.post('/journal/import', file, {
+      headers: { 'Content-Type': file.type || 'application/x-ndjson' },
+      onUploadProgress: event => {
+        if (onProgress && event.total) onProgress(event.loaded / event.total);
+      },
+    });
+    return response.data;
+  },
+
+  getImports: async (limit = 10): Promise<JournalImportStatus[]> => {
+    const response = await api.get(`/journal/imports?limit=${limit}`);
+    return response.data;
+  },
 };
 
 // Traits API
@@ -83,8 +127,8 @@ export const traitsAPI = {
     return response.data;
   },
 
-  getTraitsHistory: async (): Promise<any[]> => {
-    const response = await api.get('/traits/history');
+  getTraitsHistory: async (bucket?: 'day' | 'week' | 'month', range?: string): Promise<any[]> => {
+    const response = await api.get('/traits/history', { params: { bucket, range } });
     return response.data;
   },
 };
@@ -96,10 +140,72 @@ export const strategicPlanAPI = {
     return response.data;
   },
 
+  // Streams plan generation over Server-Sent Events; onField fires as each plan field completes
+  generatePlanStream: async (
+    onField: (name: keyof StrategicPlan, value: any) => void
+  ): Promise<StrategicPlan> => {
+    const token = localStorage.getItem('token');
+    const response = await fetch(`${API_BASE_URL}/strategic-plan/generate/stream`, {
+      method: 'POST',
+      headers: token ? { Authorization: `Bearer ${token}` } : {},
+    });
+    if (!response.ok || !response.body) {
+      const body = await response.json().catch(() => ({}));
+      throw { response: { data: body } };
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let plan: StrategicPlan | null = null;
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        const message = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+
+        let event = 'message';
+        let data = '';
+        for (const line of message.split('\n')) {
+          if (line.startsWith('event:')) event = line.slice(6).trim();
+          else if (line.startsWith('data:')) data += line.slice(5).trim();
+        }
+        if (!data) continue;
+
+        const payload = JSON.parse(data);
+        if (event === 'field') {
+          onField(payload.name, payload.value);
+        } else if (event === 'done') {
+          plan = payload;
+        }
+      }
+    }
+
+    if (!plan) {
+      throw new Error('Plan stream ended before completion');
+    }
+    return plan;
+  },
+
   getPlanHistory: async (skip = 0, limit = 10): Promise<StrategicPlan[]> => {
     const response = await api.get(`/strategic-plan/history?skip=${skip}&limit=${limit}`);
     return response.data;
   },
 };
 
-export default api;
\ No newline at end of file
+export default api;
+
+// Dashboard API
+export const dashboardAPI = {
+  // The browser revalidates with If-None-Match and reuses its copy on 304
+  getDashboard: async (): Promise<Dashboard> => {
+    const response = await api.get('/dashboard');
+    return response.data;
+  },
+};
\ No newline at end of file
@@ -31,6 +31,31 @@ export interface JournalEntry {
   updated_at: string;
 }
 
+export interface JournalEntrySummary {
+  id: string;
+  title: string;
+  preview: string;
+  word_count: number;
+  mood_rating?: number;
+  tags: string[];
+  created_at: string;
+  updated_at: string;
+}
+
+export interface JournalImportStatus {
+  id: string;
+  status: 'receiving' | 'completed' | 'failed';
+  format: 'ndjson' | 'array' | null;
+  received: number;
+  imported: number;
+  rejected: number;
+  errors: { record: number; error: string }[];
+  trait_status: string | null;
+  created_at: string;
+  updated_at: string;
+  finished_at: string | null;
+}
+
 export interface JournalEntryCreate {
   title: string;
   content: string;
@@ -54,6 +79,27 @@ export interface StrategicPlan {
   zen_insight: string;
 }
 
+export interface TraitHistoryPoint {
+  updated_at: string;
+  traits: BigFiveTraits;
+  updates: number;
+  trigger_entry_id: string | null;
+}
+
+export interface Dashboard {
+  user: Omit<User, 'traits'>;
+  traits: BigFiveTraits;
+  recent_entries: JournalEntrySummary[];
+  trait_history: TraitHistoryPoint[];
+  latest_plan: StrategicPlan | null;
+  journal: {
+    themes: string[];
+    mood_trend: 'improving' | 'declining' | 'neutral';
+    top_words: string[];
+    entry_count: number;
+  };
+}
+
 export interface AuthToken {
   access_token: string;
   token_type: string;